@@ -27,7 +27,7 @@ async def health_check() -> HealthCheckResponse:
             database_status = "unhealthy"
         
         # Check Redis connectivity
-        redis_status = "healthy" if cache._connected else "unhealthy"
+        redis_status = "healthy" if cache.is_connected else "unhealthy"
         
         # Check Kafka producer
         kafka_status = ("healthy" if kafka_producer._running
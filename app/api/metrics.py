@@ -16,7 +16,7 @@ from app.schemas.market_data import (
 )
 from app.models.market_data import Token, TokenTransaction, TrackingJob
 from app.services.cache import cache
-from app.services.solana.helius_client import helius_client
+from app.services.solana.helius_client import get_helius_client
 from app.services.kafka.producer import kafka_producer
 from app.core.config import settings
 
@@ -47,7 +47,7 @@ async def health_check():
     
         # Test Redis connection
         try:
-            if hasattr(cache, 'redis') and cache.redis:
+            if cache.is_connected:
                 await cache.redis.ping()
                 redis_status = "healthy"
             else:
@@ -59,7 +59,7 @@ async def health_check():
         # Test Helius API
         try:
             # Simple RPC call to test connectivity using getHealth
-            async with helius_client as client:
+            async with await get_helius_client() as client:
                 await client._make_rpc_request("getHealth", [])
             helius_status = "healthy"
         except Exception as e:
@@ -39,7 +39,7 @@ class Settings(BaseSettings):
     kafka_token_events_topic: str = "token-events"
     kafka_consumer_group: str = "memecoin-analytics-consumers"
     kafka_auto_offset_reset: str = "latest"
-    kafka_enable_auto_commit: bool = True
+    kafka_enable_auto_commit: bool = False  # Offsets committed after processing
     kafka_max_poll_interval_ms: int = 300000  # 5 minutes
         
     # Helius RPC Configuration
@@ -47,6 +47,16 @@ class Settings(BaseSettings):
     helius_rpc_url: str = "https://mainnet.helius-rpc.com"
     helius_websocket_url: str = "wss://mainnet.helius-rpc.com"
     helius_enhanced_api_url: str = "https://api.helius.xyz/v0"
+    helius_rps: int = 10  # Requests per second shared by all Helius RPC calls
+    helius_max_retries: int = 3  # Retries with exponential backoff on rate limiting
+    helius_max_concurrent: int = 20  # Concurrent requests for batched transaction fetches
+    helius_max_concurrent_rpc: int = 64  # In-flight HTTP requests to Helius per process
+    helius_balance_ttl_ms: int = 500  # How long token account balances are served from memory
+    helius_max_connections: int = 64  # HTTP connection pool size for the Helius host
+    helius_keepalive_expiry: float = 75.0  # Seconds an idle pooled connection is kept open
+    helius_connect_timeout: float = 5.0  # Seconds to establish a new connection
+    helius_force_ipv4: bool = True  # Connect to Helius over IPv4 only
+    helius_persistent_cache_ttl: int = 86400  # Redis TTL for immutable RPC responses; 0 disables
     
     # Rate Limiting
     rate_limit_requests: int = 100
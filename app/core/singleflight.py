@@ -0,0 +1,47 @@
+"""
+Single-flight loading for concurrent callers.
+Callers asking for the same key while a load is running share its result.
+"""
+
+import asyncio
+from typing import Awaitable, Callable, Dict, Hashable, TypeVar
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    """Share one in-flight load per key between concurrent callers."""
+    
+    def __init__(self):
+        self._tasks: Dict[Hashable, asyncio.Task] = {}
+    
+    async def run(self, key: Hashable, loader: Callable[[], Awaitable[T]]) -> T:
+        """
+        Run loader once for all concurrent callers using the same key.
+        
+        The load runs as its own task and every caller awaits it through
+        asyncio.shield, so a cancelled caller never cancels the load that
+        the other callers are waiting on.
+        
+        Args:
+            key: Identifies the load being shared
+            loader: Zero-argument callable returning the load coroutine
+        
+        Returns:
+            The loader's result
+        """
+        loop = asyncio.get_running_loop()
+        task = self._tasks.get(key)
+        # A task left over from a finished event loop (Celery runs one per job) cannot be awaited here
+        if task is None or task.get_loop() is not loop:
+            task = loop.create_task(loader())
+            self._tasks[key] = task
+            task.add_done_callback(lambda done: self._forget(key, done))
+        return await asyncio.shield(task)
+    
+    def _forget(self, key: Hashable, task: asyncio.Task):
+        """Drop a finished load so the next caller starts a fresh one."""
+        if self._tasks.get(key) is task:
+            del self._tasks[key]
+        if not task.cancelled():
+            task.exception()  # Mark retrieved; callers that are still waiting receive it
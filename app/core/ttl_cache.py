@@ -0,0 +1,44 @@
+"""
+In-process caching for values that may be served for a fixed time.
+Bounded LRU caches shared by the Helius client and the analytics service.
+"""
+
+import time
+from collections import OrderedDict
+from typing import Any, Optional, Tuple
+
+
+class TTLCache:
+    """Bounded LRU cache whose entries expire a fixed time after being stored."""
+    
+    def __init__(self, name: str, ttl: float, maxsize: int = 10_000):
+        self.name = name
+        self._ttl = ttl
+        self._maxsize = maxsize
+        self._entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+    
+    def get(self, key: str) -> Optional[Any]:
+        """Return the cached value for key, or None if absent or expired."""
+        entry = self._entries.get(key)
+        if entry is not None:
+            if entry[0] > time.monotonic():
+                self.hits += 1
+                self._entries.move_to_end(key)
+                return entry[1]
+            del self._entries[key]
+        self.misses += 1
+        return None
+    
+    def pop(self, key: str):
+        """Drop key from the cache if present."""
+        self._entries.pop(key, None)
+    
+    def set(self, key: str, value: Any):
+        """Store a value, evicting the least recently used entry when the cache is full."""
+        if key in self._entries:
+            self._entries.move_to_end(key)
+        elif len(self._entries) >= self._maxsize:
+            self._entries.popitem(last=False)
+        self._entries[key] = (time.monotonic() + self._ttl, value)
@@ -20,6 +20,7 @@ from app.api import health, metrics, prices
 from app.core.config import settings
 from app.core.database import init_db
 from app.core.logging import setup_logging, get_logger
+from app.services.cache import cache
 from app.services.websocket_manager import solana_websocket_manager
 from app.middleware.performance import PerformanceMiddleware
 
@@ -59,6 +60,12 @@ async def lifespan(app: FastAPI):
         await init_db()
         logger.info("Database initialized successfully")
         
+        # Connect the shared Redis cache once; cache calls no longer reconnect lazily
+        try:
+            await cache.connect()
+        except Exception as e:
+            logger.warning("Redis cache unavailable, continuing without cache", extra={"error": str(e)})
+        
         # Token analytics service initialization removed - using async context managers instead
         
         # Start WebSocket manager for real-time updates
@@ -84,6 +91,15 @@ async def lifespan(app: FastAPI):
         await shutdown_helius_client()
         logger.info("Helius client shutdown completed")
         
+        from app.services.providers.factory import shutdown_providers
+        await shutdown_providers()
+        
+        # Write metric rows still waiting for the next bulk insert
+        from app.services.token_analytics_service import token_analytics_service
+        await token_analytics_service.flush_metric_writes()
+        
+        await cache.disconnect()
+        
     except Exception as e:
         logger.error("Error during shutdown", extra={"error": str(e)})
 
@@ -3,64 +3,117 @@ Redis-based caching service for market data.
 Provides caching for price data, moving averages, and provider responses.
 """
 
+import asyncio
 import json
 import pickle
-from datetime import datetime, timedelta
-from typing import Any, Optional, Dict, List, Union
+from datetime import datetime, timedelta, timezone
+from typing import Any, Optional, Dict, List, Set, Union
 
+import orjson
 import redis.asyncio as redis
 from redis.asyncio import ConnectionPool
 
 from app.core.config import settings
 from app.core.logging import get_logger
+from app.core.singleflight import SingleFlight
 
 logger = get_logger(__name__)
 
+# Pickle fallback protocol (protocol 5 supports out-of-band buffers)
+_PICKLE_PROTO = pickle.HIGHEST_PROTOCOL
+
+# Members fetched per SSCAN / keys per UNLINK when invalidating a tag
+_TAG_SCAN_BATCH = 500
+
+# Sets KEYS[1] to ARGV[1] with TTL ARGV[2] and adds it to every tag set in
+# KEYS[2..n], expiring each tag set after ARGV[3] seconds
+_TAG_SET_LUA = """
+redis.call('SETEX', KEYS[1], ARGV[2], ARGV[1])
+for i = 2, #KEYS do
+    redis.call('SADD', KEYS[i], KEYS[1])
+    redis.call('EXPIRE', KEYS[i], ARGV[3])
+end
+return 1
+"""
+
+# Token metrics are served as-is when fresh and revalidated in the background when stale
+_METRICS_FRESH_AGE = timedelta(minutes=5)
+_METRICS_STALE_AGE = timedelta(minutes=10)
+
+
+def encode_items(items: Dict[str, Any]) -> Dict[str, bytes]:
+    """JSON-encode cache values up front for CacheService.batch_set_raw."""
+    return {
+        key: orjson.dumps(value, default=str, option=orjson.OPT_NON_STR_KEYS)
+        for key, value in items.items()
+    }
+
 
 class CacheService:
     """Redis-based cache service for market data."""
     
     def __init__(self):
         self.pool: Optional[ConnectionPool] = None
-        self.redis: Optional[redis.Redis] = None
+        self._redis: Optional[redis.Redis] = None
         self._connected = False
+        self._connect_lock = asyncio.Lock()
+        # Token addresses with a background metrics refresh scheduled or running
+        self._refreshing: Set[str] = set()
+        self._background_tasks: Set[asyncio.Task] = set()
+        self._inflight = SingleFlight()
+        self._tag_set_script = None
         self.default_ttl = settings.redis_cache_ttl  # Add default TTL property
     
+    @property
+    def redis(self) -> redis.Redis:
+        """Active Redis client; connect() must be awaited at startup."""
+        if self._redis is None:
+            raise RuntimeError("Redis cache not connected")
+        return self._redis
+    
+    @property
+    def is_connected(self) -> bool:
+        """Whether connect() has succeeded and disconnect() has not been called since."""
+        return self._connected
+    
     async def connect(self):
-        """Initialize Redis connection."""
-        try:
-            self.pool = ConnectionPool.from_url(
-                settings.redis_url,
-                decode_responses=True,
-                max_connections=20,
-                retry_on_timeout=True,
-            )
-            self.redis = redis.Redis(connection_pool=self.pool)
+        """Initialize Redis connection (idempotent)."""
+        async with self._connect_lock:
+            if self._connected:
+                return
             
-            # Test connection
-            await self.redis.ping()
-            self._connected = True
-            logger.info("Redis cache connected successfully")
-            
-        except Exception as e:
-            logger.error("Failed to connect to Redis", extra={"error": str(e)})
-            self._connected = False
-            raise
+            try:
+                self.pool = ConnectionPool.from_url(
+                    settings.redis_url,
+                    decode_responses=False,  # Values stay as raw bytes
+                    max_connections=20,
+                    retry_on_timeout=True,
+                )
+                self._redis = redis.Redis(connection_pool=self.pool)
+                
+                # Test connection
+                await self._redis.ping()
+                
+                # EVALSHA wrapper; the script is loaded on first use if missing
+                self._tag_set_script = self._redis.register_script(_TAG_SET_LUA)
+                self._connected = True
+                logger.info("Redis cache connected successfully")
+                
+            except Exception as e:
+                logger.error("Failed to connect to Redis", extra={"error": str(e)})
+                self._connected = False
+                raise
     
     async def disconnect(self):
         """Close Redis connection."""
-        if self.redis:
-            await self.redis.aclose()
+        if self._redis:
+            await self._redis.aclose()
+            self._redis = None
         if self.pool:
             await self.pool.aclose()
         self._connected = False
         logger.info("Redis connection closed")
     
-    async def _ensure_connection(self):
-        """Ensure Redis connection is active."""
-        if not self._connected or not self.redis:
-            await self.connect()
-    
     def _make_key(self, prefix: str, *args: str) -> str:
         """Create a cache key with consistent formatting."""
         parts = [prefix] + [str(arg).upper() for arg in args]
@@ -68,8 +121,6 @@ class CacheService:
     
     async def get(self, key: str) -> Optional[Any]:
         """Get value from cache."""
-        await self._ensure_connection()
-        
         try:
             value = await self.redis.get(key)
             if value is None:
@@ -78,16 +129,25 @@ class CacheService:
             # Try to deserialize as JSON first, then pickle
             try:
                 return json.loads(value)
-            except (json.JSONDecodeError, TypeError):
+            except (ValueError, TypeError):
                 try:
-                    return pickle.loads(value.encode('latin1'))
+                    return pickle.loads(value)
                 except Exception:
-                    return value
+                    return value.decode('utf-8', errors='replace')
                     
         except Exception as e:
             logger.error("Cache get error", extra={"key": key, "error": str(e)})
             return None
     
+    def _serialize(self, value: Any, serialize_json: bool = True) -> Union[str, bytes]:
+        """Serialize a value for storage, falling back to pickle for non-JSON types."""
+        if serialize_json:
+            try:
+                return json.dumps(value, default=str)
+            except (TypeError, ValueError):
+                return pickle.dumps(value, protocol=_PICKLE_PROTO)
+        return str(value)
+    
     async def set(
         self, 
         key: str, 
@@ -96,20 +156,10 @@ class CacheService:
         serialize_json: bool = True
     ) -> bool:
         """Set value in cache with optional TTL."""
-        await self._ensure_connection()
-        
         try:
             ttl = ttl or settings.redis_cache_ttl
             
-            # Serialize value
-            if serialize_json:
-                try:
-                    serialized_value = json.dumps(value, default=str)
-                except (TypeError, ValueError):
-                    serialized_value = pickle.dumps(value).decode('latin1')
-            else:
-                serialized_value = str(value)
-            
+            serialized_value = self._serialize(value, serialize_json)
             await self.redis.setex(key, ttl, serialized_value)
             logger.debug("Cache set", extra={"key": key, "ttl": ttl})
             return True
@@ -118,10 +168,26 @@ class CacheService:
             logger.error("Cache set error", extra={"key": key, "error": str(e)})
             return False
     
+    async def get_raw(self, key: str) -> Optional[bytes]:
+        """Get the stored bytes for key without deserializing them."""
+        try:
+            return await self.redis.get(key)
+        except Exception as e:
+            logger.error("Cache get error", extra={"key": key, "error": str(e)})
+            return None
+    
+    async def set_raw(self, key: str, value: bytes, ttl: Optional[int] = None) -> bool:
+        """Store already-encoded bytes with optional TTL."""
+        try:
+            ttl = ttl or settings.redis_cache_ttl
+            await self.redis.setex(key, ttl, value)
+            return True
+        except Exception as e:
+            logger.error("Cache set error", extra={"key": key, "error": str(e)})
+            return False
+    
     async def delete(self, key: str) -> bool:
         """Delete key from cache."""
-        await self._ensure_connection()
-        
         try:
             result = await self.redis.delete(key)
             logger.debug("Cache delete", extra={"key": key, "existed": bool(result)})
@@ -133,8 +199,6 @@ class CacheService:
     
     async def exists(self, key: str) -> bool:
         """Check if key exists in cache."""
-        await self._ensure_connection()
-        
         try:
             return bool(await self.redis.exists(key))
         except Exception as e:
@@ -143,8 +207,6 @@ class CacheService:
     
     async def ttl(self, key: str) -> Optional[int]:
         """Get TTL for a key."""
-        await self._ensure_connection()
-        
         try:
             ttl_value = await self.redis.ttl(key)
             return ttl_value if ttl_value >= 0 else None
@@ -154,8 +216,6 @@ class CacheService:
     
     async def increment(self, key: str, amount: int = 1, ttl: Optional[int] = None) -> Optional[int]:
         """Increment a numeric value in cache."""
-        await self._ensure_connection()
-        
         try:
             pipe = self.redis.pipeline()
             pipe.incr(key, amount)
@@ -207,8 +267,6 @@ class CacheService:
     
     async def invalidate_symbol_cache(self, symbol: str) -> int:
         """Invalidate all cache entries for a symbol."""
-        await self._ensure_connection()
-        
         try:
             pattern = f"*:{symbol.upper()}:*"
             keys = await self.redis.keys(pattern)
@@ -229,10 +287,14 @@ class CacheService:
     
     async def get_cache_stats(self) -> Dict[str, Any]:
         """Get cache statistics."""
-        await self._ensure_connection()
-        
         try:
-            info = await self.redis.info()
+            # Only request the sections we report on, in a single round-trip
+            pipe = self.redis.pipeline(transaction=False)
+            pipe.info("memory")
+            pipe.info("stats")
+            pipe.info("clients")
+            memory, stats, clients = await pipe.execute()
+            info = {**memory, **stats, **clients}
             
             return {
                 "connected_clients": info.get("connected_clients", 0),
@@ -272,7 +334,6 @@ class CacheService:
             cache_tasks.append(metrics_task)
             
             # Execute cache warming tasks
-            import asyncio
             results = await asyncio.gather(*cache_tasks, return_exceptions=True)
             
             success_count = sum(1 for r in results if not isinstance(r, Exception))
@@ -294,10 +355,21 @@ class CacheService:
     
     async def batch_set(self, items: Dict[str, Any], ttl: Optional[int] = None) -> int:
         """Set multiple cache items in a single operation."""
+        if not items:
+            return 0
+        
         try:
-            await self._ensure_connection()
-            
-            if not items:
+            encoded_items = encode_items(items)
+        except Exception as e:
+            logger.error("Batch cache set failed", extra={"error": str(e)})
+            return 0
+        
+        return await self.batch_set_raw(encoded_items, ttl)
+    
+    async def batch_set_raw(self, encoded_items: Dict[str, bytes], ttl: Optional[int] = None) -> int:
+        """Set multiple pre-encoded cache items in a single pipeline."""
+        try:
+            if not encoded_items:
                 return 0
             
             # Use Redis pipeline for batch operations
@@ -305,16 +377,15 @@ class CacheService:
             
             ttl_to_use = ttl or self.default_ttl
             
-            for key, value in items.items():
-                serialized_value = json.dumps(value, default=str) if isinstance(value, (dict, list)) else str(value)
-                pipe.setex(key, ttl_to_use, serialized_value)
+            for key, value in encoded_items.items():
+                pipe.setex(key, ttl_to_use, value)
             
             results = await pipe.execute()
             success_count = sum(1 for r in results if r)
             
             logger.debug("Batch cache set completed", extra={
                 "items_set": success_count,
-                "total_items": len(items)
+                "total_items": len(encoded_items)
             })
             
             return success_count
@@ -326,8 +397,6 @@ class CacheService:
     async def batch_get(self, keys: List[str]) -> Dict[str, Any]:
         """Get multiple cache items in a single operation."""
         try:
-            await self._ensure_connection()
-            
             if not keys:
                 return {}
             
@@ -346,9 +415,9 @@ class CacheService:
                     try:
                         # Try to deserialize as JSON first
                         cache_data[key] = json.loads(result)
-                    except json.JSONDecodeError:
+                    except ValueError:
                         # Fallback to string value
-                        cache_data[key] = result
+                        cache_data[key] = result.decode('utf-8', errors='replace')
             
             hit_count = len(cache_data)
             miss_count = len(keys) - hit_count
@@ -368,8 +437,6 @@ class CacheService:
     async def invalidate_token_cache(self, token_address: str) -> int:
         """Invalidate all cache entries for a specific token."""
         try:
-            await self._ensure_connection()
-            
             # Pattern for token-related cache keys
             patterns = [
                 f"metrics:{token_address}",
@@ -405,31 +472,35 @@ class CacheService:
             return 0
     
     async def get_token_metrics_cached(self, token_address: str) -> Optional[Dict[str, Any]]:
-        """Get token metrics with intelligent caching."""
+        """
+        Get token metrics with stale-while-revalidate caching.
+        
+        Data younger than 5 minutes is returned as-is. Data between 5 and 10
+        minutes old is returned immediately while a background refresh runs.
+        Anything older (or a miss) is refreshed before returning.
+        """
         cache_key = f"metrics:{token_address}"
         
         # Try to get from cache first
         cached_data = await self.get(cache_key)
         if cached_data:
-            # Check if data is recent enough (under 5 minutes)
             cached_time = cached_data.get("timestamp")
             if cached_time:
-                from datetime import datetime, timezone, timedelta
                 try:
                     cached_dt = datetime.fromisoformat(cached_time.replace('Z', '+00:00'))
-                    if datetime.now(timezone.utc) - cached_dt < timedelta(minutes=5):
+                    age = datetime.now(timezone.utc) - cached_dt
+                    if age < _METRICS_FRESH_AGE:
+                        return cached_data
+                    if age < _METRICS_STALE_AGE:
+                        self._schedule_metrics_refresh(token_address)
                         return cached_data
                 except Exception:
                     pass  # Invalid timestamp, continue to refresh
         
-        # Cache miss or stale data - refresh in background
+        # Cache miss or expired data - refresh before returning
         try:
-            from app.services.token_analytics_service import token_analytics_service
-            fresh_data = await token_analytics_service.get_comprehensive_metrics(token_address)
-            
+            fresh_data = await self._refresh_metrics(token_address)
             if fresh_data:
-                # Cache the fresh data
-                await self.set(cache_key, fresh_data, ttl=300)  # 5 minutes
                 return fresh_data
             
         except Exception as e:
@@ -443,28 +514,62 @@ class CacheService:
         
         return None
     
+    async def _refresh_metrics(self, token_address: str) -> Optional[Dict[str, Any]]:
+        """Recompute token metrics, sharing one computation between concurrent callers."""
+        return await self._inflight.run(token_address, lambda: self._load_metrics(token_address))
+    
+    async def _load_metrics(self, token_address: str) -> Optional[Dict[str, Any]]:
+        """Compute token metrics and store them for the stale window."""
+        from app.services.token_analytics_service import token_analytics_service
+        
+        fresh_data = await token_analytics_service.get_comprehensive_metrics(token_address)
+        if fresh_data:
+            # Keep entries past the fresh window so they can be served stale
+            await self.set(
+                f"metrics:{token_address}",
+                fresh_data,
+                ttl=int(_METRICS_STALE_AGE.total_seconds())
+            )
+        return fresh_data
+    
+    def _schedule_metrics_refresh(self, token_address: str) -> None:
+        """Start a background metrics refresh unless one is already running."""
+        # Marked when scheduled, not when the task starts, so stale hits in the
+        # same loop iteration do not each start a refresh
+        if token_address in self._refreshing:
+            return
+        self._refreshing.add(token_address)
+        
+        task = asyncio.create_task(self._background_refresh(token_address))
+        self._background_tasks.add(task)
+        task.add_done_callback(self._background_tasks.discard)
+        # A done callback also runs if the task is cancelled before it starts
+        task.add_done_callback(lambda _: self._refreshing.discard(token_address))
+    
+    async def _background_refresh(self, token_address: str) -> None:
+        """Refresh metrics in the background, logging instead of raising."""
+        try:
+            await self._refresh_metrics(token_address)
+        except Exception as e:
+            logger.warning("Background token metrics refresh failed", extra={
+                "token_address": token_address,
+                "error": str(e)
+            })
+    
     async def set_with_tags(self, key: str, value: Any, tags: List[str], ttl: Optional[int] = None) -> bool:
         """Set cache item with tags for group invalidation."""
         try:
-            await self._ensure_connection()
-            
-            # Set the main cache item
-            success = await self.set(key, value, ttl)
-            
-            if success and tags:
-                # Add key to tag sets for group invalidation
-                pipe = self.redis.pipeline()
-                
-                for tag in tags:
-                    tag_key = f"tag:{tag}"
-                    pipe.sadd(tag_key, key)
-                    if ttl:
-                        # Set expiration for tag slightly longer than cache item
-                        pipe.expire(tag_key, ttl + 60)
-                
-                await pipe.execute()
-            
-            return success
+            ttl = ttl or self.default_ttl
+            tag_keys = [f"tag:{tag}" for tag in tags]
+            
+            # Value and tag memberships are written atomically in one round-trip;
+            # tag sets expire slightly later than the cache item
+            await self._tag_set_script(
+                keys=[key, *tag_keys],
+                args=[self._serialize(value), ttl, ttl + 60],
+            )
+            logger.debug("Tagged cache set", extra={"key": key, "ttl": ttl, "tags": len(tag_keys)})
+            return True
             
         except Exception as e:
             logger.error("Tagged cache set failed", extra={"key": key, "error": str(e)})
@@ -473,21 +578,22 @@ class CacheService:
     async def invalidate_by_tag(self, tag: str) -> int:
         """Invalidate all cache items with a specific tag."""
         try:
-            await self._ensure_connection()
-            
             tag_key = f"tag:{tag}"
             
-            # Get all keys with this tag
-            keys = await self.redis.smembers(tag_key)
-            
-            if not keys:
-                return 0
+            # Walk the tag set incrementally and unlink in bounded batches
+            deleted = 0
+            batch: List[bytes] = []
+            async for key in self.redis.sscan_iter(tag_key, count=_TAG_SCAN_BATCH):
+                batch.append(key)
+                if len(batch) >= _TAG_SCAN_BATCH:
+                    deleted += await self.redis.unlink(*batch)
+                    batch.clear()
             
-            # Delete all tagged keys
-            deleted = await self.redis.delete(*keys)
+            if batch:
+                deleted += await self.redis.unlink(*batch)
             
             # Delete the tag set itself
-            await self.redis.delete(tag_key)
+            await self.redis.unlink(tag_key)
             
             logger.info("Cache invalidated by tag", extra={
                 "tag": tag,
@@ -3,6 +3,7 @@ Kafka configuration and connection settings.
 Provides configuration for producers and consumers with error handling.
 """
 
+from types import MappingProxyType
 from typing import Dict, Any
 from app.core.config import settings
 from app.core.logging import get_logger
@@ -10,60 +11,82 @@ from app.core.logging import get_logger
 logger = get_logger(__name__)
 
 
+# Configurations are built once at import; settings do not change at runtime
+_PRODUCER_CONFIG = MappingProxyType({
+    'bootstrap.servers': settings.kafka_bootstrap_servers,
+    'client.id': 'market-data-producer',
+    'acks': 'all',  # Wait for all replicas to acknowledge
+    'retries': 3,
+    'retry.backoff.ms': 1000,
+    'delivery.timeout.ms': 30000,
+    'request.timeout.ms': 25000,
+    'enable.idempotence': True,  # Exactly-once per partition; keeps ordering with retries
+    'max.in.flight.requests.per.connection': 5,  # Max allowed with idempotence
+    'compression.type': 'zstd',  # Requires brokers >= 2.1
+    'compression.level': 3,
+    'batch.size': 1048576,  # 1MB
+    'linger.ms': 20,  # Small delay to allow batching
+    'batch.num.messages': 20000,
+    'queue.buffering.max.kbytes': 2097152,  # 2GB in KB (equivalent to buffer.memory)
+    'queue.buffering.max.messages': 100000,
+    # Note: serializers are handled in the producer code, not in config
+})
+
+_CONSUMER_CONFIG = MappingProxyType({
+    'bootstrap.servers': settings.kafka_bootstrap_servers,
+    'group.id': settings.kafka_consumer_group,
+    'client.id': 'market-data-consumer',
+    'auto.offset.reset': settings.kafka_auto_offset_reset,
+    'enable.auto.commit': settings.kafka_enable_auto_commit,
+    # Offsets are stored explicitly once a partition's batch is persisted, so an
+    # auto commit never covers messages that were consumed but not stored
+    'enable.auto.offset.store': False,
+    'auto.commit.interval.ms': 5000,
+    'max.poll.interval.ms': settings.kafka_max_poll_interval_ms,
+    'session.timeout.ms': 30000,
+    'heartbeat.interval.ms': 10000,
+    # Prefetch in librdkafka's background thread while the previous batch is processed
+    'fetch.min.bytes': 1048576,  # 1MB - fewer, larger fetches
+    'fetch.wait.max.ms': 50,
+    'fetch.max.bytes': 52428800,  # 50MB
+    'max.partition.fetch.bytes': 10485760,  # 10MB
+    'queued.min.messages': 100000,
+    'queued.max.messages.kbytes': 1048576,  # 1GB local prefetch queue
+    # Note: deserializers are handled in the consumer code, not in config
+})
+
+_TOPIC_SETTINGS = MappingProxyType({
+    'retention.ms': '604800000',  # 7 days
+    'cleanup.policy': 'delete',
+    'compression.type': 'zstd',
+    'max.message.bytes': '1048576',  # 1MB
+})
+
+_TOPIC_CONFIG = MappingProxyType({
+    'num_partitions': 3,
+    'replication_factor': 1,  # For development
+    'config': _TOPIC_SETTINGS,
+})
+
+
 class KafkaConfig:
     """Kafka configuration class."""
     
     @staticmethod
     def get_producer_config() -> Dict[str, Any]:
         """Get Kafka producer configuration."""
-        return {
-            'bootstrap.servers': settings.kafka_bootstrap_servers,
-            'client.id': 'market-data-producer',
-            'acks': 'all',  # Wait for all replicas to acknowledge
-            'retries': 3,
-            'retry.backoff.ms': 1000,
-            'delivery.timeout.ms': 30000,
-            'request.timeout.ms': 25000,
-            'max.in.flight.requests.per.connection': 1,  # Ensure ordering
-            'compression.type': 'gzip',
-            'batch.size': 16384,
-            'linger.ms': 10,  # Small delay to allow batching
-            'queue.buffering.max.kbytes': 32768,  # 32MB in KB (equivalent to buffer.memory)
-            'queue.buffering.max.messages': 100000,
-            # Note: serializers are handled in the producer code, not in config
-        }
+        # confluent_kafka requires a real dict, so hand out a shallow copy
+        return dict(_PRODUCER_CONFIG)
     
     @staticmethod
     def get_consumer_config() -> Dict[str, Any]:
         """Get Kafka consumer configuration."""
-        return {
-            'bootstrap.servers': settings.kafka_bootstrap_servers,
-            'group.id': settings.kafka_consumer_group,
-            'client.id': 'market-data-consumer',
-            'auto.offset.reset': settings.kafka_auto_offset_reset,
-            'enable.auto.commit': settings.kafka_enable_auto_commit,
-            'auto.commit.interval.ms': 5000,
-            'max.poll.interval.ms': settings.kafka_max_poll_interval_ms,
-            'session.timeout.ms': 30000,
-            'heartbeat.interval.ms': 10000,
-            'fetch.min.bytes': 1024,
-            'fetch.wait.max.ms': 5000,  # Fixed: correct librdkafka property
-            # Note: deserializers are handled in the consumer code, not in config
-        }
+        return dict(_CONSUMER_CONFIG)
     
     @staticmethod
     def get_topic_config() -> Dict[str, Any]:
         """Get topic configuration for creation."""
-        return {
-            'num_partitions': 3,
-            'replication_factor': 1,  # For development
-            'config': {
-                'retention.ms': '604800000',  # 7 days
-                'cleanup.policy': 'delete',
-                'compression.type': 'gzip',
-                'max.message.bytes': '1048576',  # 1MB
-            }
-        }
+        return {**_TOPIC_CONFIG, 'config': dict(_TOPIC_SETTINGS)}
     
     @staticmethod
     def get_topics() -> Dict[str, str]:
@@ -73,4 +96,4 @@ class KafkaConfig:
             'analytics': 'token-analytics',
             'errors': 'token-analytics-errors',
             'dead_letter': 'token-analytics-dlq',
-        } 
\ No newline at end of file
+        }
@@ -3,27 +3,150 @@ Kafka consumer service for processing token analytics events.
 """
 
 import asyncio
-import json
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
 from datetime import datetime, timezone
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, Optional, List, Tuple
 from statistics import mean
+from uuid import uuid4
 
-from confluent_kafka import Consumer, KafkaError
+import asyncpg
+import orjson
+from confluent_kafka import Consumer, KafkaError, Producer, TopicPartition
 from sqlalchemy import select, desc
+from sqlalchemy.exc import DBAPIError, InterfaceError, OperationalError
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.dialects.postgresql import insert
 
 from app.core.config import settings
 from app.core.database import get_async_db
 from app.core.logging import get_logger
 from app.models.market_data import (
-    Token, TokenTransaction, TokenHolder, TokenMetrics
+    AnalyticsEvent, Token, TokenTransaction, TokenHolder, TokenMetrics
 )
 from app.services.kafka.config import KafkaConfig
 from app.services.cache import cache
 
 logger = get_logger(__name__)
 
+# Maximum number of messages fetched per consume() call
+_CONSUME_BATCH_SIZE = 500
+
+# Threads used to decode consumed batches off the event loop
+_DECODE_WORKERS = 4
+
+# Pause before re-consuming partitions whose batch failed to persist
+_RETRY_BACKOFF_SECONDS = 1.0
+
+# Attempts at storing a batch as a whole after connection-level errors before
+# it is stored row by row, with rejected rows sent to the dead-letter topic
+_MAX_BATCH_ATTEMPTS = 3
+
+# Seconds to wait for dead-letter deliveries before the batch is retried instead
+_DEAD_LETTER_FLUSH_TIMEOUT = 30.0
+
+# Database errors worth retrying: the connection failed, not the data
+_RETRYABLE_DB_ERRORS = (
+    OSError,
+    asyncio.TimeoutError,
+    asyncpg.PostgresConnectionError,
+    asyncpg.InterfaceError,
+    OperationalError,
+    InterfaceError,
+)
+
+# analytics_events column limits; a longer value would fail the whole COPY
+_EVENT_TYPE_MAX_LENGTH = AnalyticsEvent.__table__.c.event_type.type.length
+_TOKEN_ADDRESS_MAX_LENGTH = AnalyticsEvent.__table__.c.token_address.type.length
+_SOURCE_MAX_LENGTH = AnalyticsEvent.__table__.c.source.type.length
+
+# Column order of the records COPYed into analytics_events
+_ANALYTICS_EVENT_COLUMNS = ("id", "event_type", "token_address", "event_data", "source", "timestamp")
+
+
+# (event_type, token_address, source, timestamp)
+_EventHeader = Tuple[str, str, str, datetime]
+
+# (header, decoded event body, raw payload as received)
+_DecodedEvent = Tuple[_EventHeader, Dict[str, Any], bytes]
+
+
+def _is_column_string(value: Any, max_length: int) -> bool:
+    """Check that a value can be stored in a non-empty String(max_length) column."""
+    return isinstance(value, str) and 0 < len(value) <= max_length
+
+
+def _is_retryable_db_error(error: BaseException) -> bool:
+    """Check whether a database error is connection-level rather than caused by the data."""
+    if isinstance(error, DBAPIError) and error.connection_invalidated:
+        return True
+    return isinstance(error, _RETRYABLE_DB_ERRORS)
+
+
+def _extract_event_header(event_data: Dict[str, Any]) -> Optional[_EventHeader]:
+    """
+    Read the routing fields of a decoded event in one place.
+    
+    Args:
+        event_data: Decoded event payload
+        
+    Returns:
+        (event_type, token_address, source, timestamp), or None if the event
+        lacks a type or token address, or a field does not fit its column
+    """
+    event_type = event_data.get("event_type")
+    token_address = event_data.get("token_address")
+    # A null source takes the default instead of violating NOT NULL
+    source = event_data.get("source") or "kafka"
+    if not (
+        _is_column_string(event_type, _EVENT_TYPE_MAX_LENGTH)
+        and _is_column_string(token_address, _TOKEN_ADDRESS_MAX_LENGTH)
+        and _is_column_string(source, _SOURCE_MAX_LENGTH)
+    ):
+        return None
+    
+    try:
+        timestamp = datetime.fromisoformat(event_data.get("timestamp").replace('Z', '+00:00'))
+    except (ValueError, AttributeError):
+        timestamp = datetime.now(timezone.utc)
+    if timestamp.tzinfo is None:
+        timestamp = timestamp.replace(tzinfo=timezone.utc)
+    
+    return event_type, token_address, source, timestamp
+
+
+def _decode_batch(payloads: List[bytes]) -> Tuple[List[_DecodedEvent], int]:
+    """
+    Decode raw message payloads into routing headers and event bodies.
+    
+    Runs in the decode thread pool, so it only logs and never touches
+    consumer state.
+    
+    Args:
+        payloads: Raw Kafka message values
+        
+    Returns:
+        Tuple of (decoded (header, event_data, payload) triples, number of unusable messages)
+    """
+    events = []
+    failed = 0
+    for payload in payloads:
+        try:
+            event_data = orjson.loads(payload)
+        except orjson.JSONDecodeError as e:
+            logger.error("Failed to parse message JSON", extra={"error": str(e)})
+            failed += 1
+            continue
+        
+        header = _extract_event_header(event_data) if isinstance(event_data, dict) else None
+        if header is None:
+            logger.warning("Invalid token event data", extra={"event": event_data})
+            failed += 1
+            continue
+        
+        events.append((header, event_data, payload))
+    
+    return events, failed
+
 
 class KafkaConsumerService:
     """Kafka consumer service for processing token analytics events."""
@@ -39,14 +162,33 @@ class KafkaConsumerService:
             "events_processed": 0,
             "start_time": None
         }
+        self._start_monotonic: Optional[float] = None
+        # Worker pools are created per start() so a stopped consumer can be restarted
+        self._decode_pool: Optional[ThreadPoolExecutor] = None
+        self._consume_pool: Optional[ThreadPoolExecutor] = None
+        # The consume() call currently running in _consume_pool, and the signal
+        # that the processing loop has returned; stop() waits on both
+        self._consume_future: Optional[Future] = None
+        self._loop_exited: Optional[asyncio.Event] = None
+        # Publishes events the database rejects to the dead-letter topic
+        self._dead_letter_producer: Optional[Producer] = None
+        # Failed whole-batch attempts per (topic, partition) since its last stored batch
+        self._batch_attempts: Dict[Tuple[str, int], int] = {}
     
     async def start(self):
         """Initialize the Kafka consumer."""
         try:
             self.consumer = Consumer(self.config)
             self.consumer.subscribe([self.topics['token_events']])
+            self._decode_pool = ThreadPoolExecutor(
+                max_workers=_DECODE_WORKERS, thread_name_prefix="kafka-decode"
+            )
+            self._consume_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="kafka-consume")
+            self._dead_letter_producer = Producer(KafkaConfig.get_producer_config())
+            self._batch_attempts.clear()
             self._running = True
             self._processing_stats["start_time"] = datetime.now(timezone.utc)
+            self._start_monotonic = time.monotonic()
             
             logger.info("Kafka consumer started successfully", extra={
                 "topics": [self.topics['token_events']],
@@ -59,14 +201,37 @@ class KafkaConsumerService:
     
     async def stop(self):
         """Stop the Kafka consumer."""
+        # The loop checks _running before each poll; let it finish its batch
+        self._running = False
+        if self._loop_exited is not None:
+            await self._loop_exited.wait()
+        
+        # librdkafka handles must not be closed while another thread is using
+        # them, so wait out a consume() still blocked in its worker thread
+        if self._consume_future is not None and not self._consume_future.done():
+            await asyncio.wait([asyncio.wrap_future(self._consume_future)])
+        
         if self.consumer:
             try:
                 self.consumer.close()
-                self._running = False
                 logger.info("Kafka consumer stopped successfully")
                 
             except Exception as e:
                 logger.error("Error stopping Kafka consumer", extra={"error": str(e)})
+            
+            self.consumer = None
+        
+        if self._dead_letter_producer is not None:
+            # Offsets past dead-lettered rows are only committed after delivery,
+            # so anything still queued here is consumed again on restart
+            self._dead_letter_producer.flush(_DEAD_LETTER_FLUSH_TIMEOUT)
+            self._dead_letter_producer = None
+        
+        for pool in (self._consume_pool, self._decode_pool):
+            if pool is not None:
+                pool.shutdown(wait=False)
+        self._consume_pool = None
+        self._decode_pool = None
     
     async def process_messages(self):
         """Main processing loop for consuming and processing messages."""
@@ -75,95 +240,254 @@ class KafkaConsumerService:
             return
         
         logger.info("Starting message processing loop")
-        
+        self._loop_exited = asyncio.Event()
+        try:
+            await self._processing_loop()
+        finally:
+            self._loop_exited.set()
+    
+    async def _processing_loop(self):
+        """Consume, persist and commit batches until the consumer is stopped."""
         while self._running:
             try:
-                msg = self.consumer.poll(timeout=1.0)
+                # Block in a worker thread during the fetch wait so the event loop stays free
+                self._consume_future = self._consume_pool.submit(
+                    self.consumer.consume, _CONSUME_BATCH_SIZE, 1.0
+                )
+                msgs = await asyncio.wrap_future(self._consume_future)
                 
-                if msg is None:
+                if not msgs:
                     continue
                 
-                if msg.error():
-                    if msg.error().code() == KafkaError._PARTITION_EOF:
-                        logger.debug("Reached end of partition")
+                # Messages are only ordered within a partition, so group them per partition
+                partitions: Dict[Tuple[str, int], List[Any]] = {}
+                for msg in msgs:
+                    if msg.error():
+                        if msg.error().code() == KafkaError._PARTITION_EOF:
+                            logger.debug("Reached end of partition")
+                        else:
+                            logger.error("Consumer error", extra={"error": str(msg.error())})
                         continue
+                    partitions.setdefault((msg.topic(), msg.partition()), []).append(msg)
+                
+                if not partitions:
+                    continue
+                
+                # Each partition is processed concurrently in its own session/transaction
+                results = await asyncio.gather(
+                    *(self._process_batch(partition_msgs) for partition_msgs in partitions.values()),
+                    return_exceptions=True
+                )
+                
+                stored_offsets = []
+                failed = []
+                for partition_msgs, stored in zip(partitions.values(), results):
+                    if isinstance(stored, BaseException):
+                        logger.error("Error processing partition batch", extra={"error": str(stored)})
+                    if stored is True:
+                        last = partition_msgs[-1]
+                        stored_offsets.append(TopicPartition(last.topic(), last.partition(), last.offset() + 1))
                     else:
-                        logger.error("Consumer error", extra={"error": str(msg.error())})
-                        continue
+                        failed.append(partition_msgs[0])
                 
-                await self._process_token_event(msg)
+                # Only partitions whose transaction committed advance their offset;
+                # with auto commit on, storing the offset hands it to the next auto commit
+                if stored_offsets:
+                    if self.config.get('enable.auto.commit'):
+                        self.consumer.store_offsets(offsets=stored_offsets)
+                    else:
+                        self.consumer.commit(offsets=stored_offsets, asynchronous=True)
+                
+                if failed:
+                    # Rewind the failed partitions to their first unstored message so
+                    # it is consumed again
+                    for msg in failed:
+                        self.consumer.seek(TopicPartition(msg.topic(), msg.partition(), msg.offset()))
+                    logger.warning("Rewound partitions after failed batch", extra={
+                        "partitions": [msg.partition() for msg in failed]
+                    })
+                    await asyncio.sleep(_RETRY_BACKOFF_SECONDS)
                 
             except Exception as e:
                 logger.error("Unexpected error in message processing", extra={"error": str(e)})
                 await asyncio.sleep(1)
     
-    async def _process_token_event(self, msg):
-        """Process a single token analytics event message."""
+    async def _process_batch(self, msgs: List[Any]) -> bool:
+        """
+        Decode one partition's messages and persist them in a single transaction.
+        
+        A connection-level failure leaves the batch to be consumed again, up to
+        _MAX_BATCH_ATTEMPTS times. Any other failure, or a batch that keeps
+        failing, is stored one event per savepoint instead, so only the events
+        the database rejects are skipped (to the dead-letter topic).
+        
+        Returns:
+            True once the batch is stored, or holds nothing storable; False if
+            it failed and the messages must be consumed again
+        """
+        # Decode off the event loop so fetching and DB flushes are not stalled by parsing
+        events, failed = await asyncio.get_running_loop().run_in_executor(
+            self._decode_pool, _decode_batch, [msg.value() for msg in msgs]
+        )
+        self._processing_stats["messages_failed"] += failed
+        
+        if not events:
+            return True
+        
+        partition = (msgs[0].topic(), msgs[0].partition())
         try:
-            event_data = json.loads(msg.value())
+            await self._store_batch(events)
+            rejected = 0
+            
+        except Exception as e:
+            attempts = self._batch_attempts.get(partition, 0) + 1
+            self._batch_attempts[partition] = attempts
+            if _is_retryable_db_error(e) and attempts < _MAX_BATCH_ATTEMPTS:
+                logger.warning("Database connection error processing token event batch", extra={
+                    "events": len(events),
+                    "attempt": attempts,
+                    "error": str(e)
+                })
+                return False
             
-            event_type = event_data.get("event_type")
-            token_address = event_data.get("token_address")
-            timestamp_str = event_data.get("timestamp")
-            source = event_data.get("source", "kafka")
+            logger.error("Database error processing token event batch, storing events one by one", extra={
+                "events": len(events),
+                "attempt": attempts,
+                "error": str(e)
+            })
+            try:
+                rejected = await self._store_events_individually(partition[0], events)
+            except Exception as row_error:
+                logger.error("Failed to store token events one by one", extra={
+                    "events": len(events),
+                    "error": str(row_error)
+                })
+                return False
+        
+        self._batch_attempts.pop(partition, None)
+        self._processing_stats["messages_processed"] += len(events) - rejected
+        self._processing_stats["events_processed"] += len(events) - rejected
+        self._processing_stats["messages_failed"] += rejected
+        
+        logger.info("Token event batch processed successfully", extra={
+            "batch_size": len(msgs),
+            "events": len(events),
+            "rejected": rejected
+        })
+        
+        return True
+    
+    async def _store_batch(self, events: List[_DecodedEvent]):
+        """Apply and audit a batch of decoded events in one transaction."""
+        async for db_session in get_async_db():
+            try:
+                for header, event_data, _ in events:
+                    await self._process_token_event(db_session, header, event_data)
+                
+                # Store raw analytics events for audit in one statement
+                await self._store_analytics_events(db_session, events)
+                
+                await db_session.commit()
+                
+            except Exception:
+                await db_session.rollback()
+                raise
             
-            if not token_address or not event_type:
-                logger.warning("Invalid token event data", extra={"event": event_data})
-                self._processing_stats["messages_failed"] += 1
-                return
+            break  # Exit the async for loop
+    
+    async def _store_events_individually(self, topic: str, events: List[_DecodedEvent]) -> int:
+        """
+        Store events one savepoint at a time, dead-lettering the rejected ones.
+        
+        Everything commits in one transaction once the rejected events have
+        been delivered to the dead-letter topic, so a retry after any failure
+        never stores an event twice.
+        
+        Args:
+            topic: Topic the events were consumed from
+            events: Decoded events of one partition batch
             
+        Returns:
+            Number of events rejected by the database
+        """
+        rejected: List[Tuple[_DecodedEvent, str]] = []
+        async for db_session in get_async_db():
             try:
-                timestamp = datetime.fromisoformat(timestamp_str.replace('Z', '+00:00'))
-            except (ValueError, AttributeError):
-                timestamp = datetime.now(timezone.utc)
+                for event in events:
+                    try:
+                        async with db_session.begin_nested():
+                            await self._process_token_event(db_session, event[0], event[1])
+                            await self._store_analytics_events(db_session, [event])
+                    except Exception as e:
+                        # A lost connection fails every row; leave the batch to be retried
+                        if _is_retryable_db_error(e):
+                            raise
+                        rejected.append((event, str(e)))
+                
+                if rejected:
+                    await self._dead_letter(topic, rejected)
+                await db_session.commit()
+                
+            except Exception:
+                await db_session.rollback()
+                raise
             
-            async for db_session in get_async_db():
-                try:
-                    # Process different types of events
-                    if event_type == "transaction":
-                        await self._process_transaction_event(db_session, event_data, timestamp)
-                    elif event_type == "holder_update":
-                        await self._process_holder_event(db_session, event_data, timestamp)
-                    elif event_type == "metrics_update":
-                        await self._process_metrics_event(db_session, event_data, timestamp)
-                    else:
-                        logger.warning("Unknown event type", extra={
-                            "event_type": event_type,
-                            "token_address": token_address
-                        })
-                    
-                    # Store raw analytics event for audit
-                    await self._store_analytics_event(db_session, event_data, timestamp)
-                    
-                    await db_session.commit()
-                    self._processing_stats["messages_processed"] += 1
-                    self._processing_stats["events_processed"] += 1
-                    
-                    logger.info("Token event processed successfully", extra={
-                        "event_type": event_type,
-                        "token_address": token_address,
-                        "source": source
-                    })
-                    
-                    break
-                    
-                except Exception as e:
-                    logger.error("Database error processing token event", extra={
-                        "token_address": token_address,
-                        "event_type": event_type,
-                        "error": str(e)
-                    })
-                    await db_session.rollback()
-                    self._processing_stats["messages_failed"] += 1
-                    raise
-                    
-        except json.JSONDecodeError as e:
-            logger.error("Failed to parse message JSON", extra={"error": str(e)})
-            self._processing_stats["messages_failed"] += 1
+            break  # Exit the async for loop
+        
+        return len(rejected)
+    
+    async def _dead_letter(self, topic: str, rejected: List[Tuple[_DecodedEvent, str]]):
+        """
+        Publish rejected events to the dead-letter topic and wait for delivery.
+        
+        Args:
+            topic: Topic the events were consumed from
+            rejected: (event, database error) pairs
             
-        except Exception as e:
-            logger.error("Unexpected error processing token event", extra={"error": str(e)})
-            self._processing_stats["messages_failed"] += 1
+        Raises:
+            RuntimeError: If any event was not delivered
+        """
+        undelivered = []
+        
+        def on_delivery(err, msg):
+            if err is not None:
+                undelivered.append(err)
+        
+        for ((event_type, token_address, _, _), _, payload), error in rejected:
+            # Keyed like the original event so it lands on the matching partition
+            self._dead_letter_producer.produce(
+                topic=self.topics['dead_letter'],
+                key=token_address.encode('utf-8'),
+                value=payload,
+                headers={"error": error, "source_topic": topic, "event_type": event_type},
+                on_delivery=on_delivery
+            )
+        
+        remaining = await asyncio.get_running_loop().run_in_executor(
+            self._decode_pool, self._dead_letter_producer.flush, _DEAD_LETTER_FLUSH_TIMEOUT
+        )
+        if remaining or undelivered:
+            raise RuntimeError(f"{remaining + len(undelivered)} dead-letter messages were not delivered")
+        
+        logger.warning("Sent rejected token events to the dead-letter topic", extra={
+            "topic": self.topics['dead_letter'],
+            "events": len(rejected),
+            "errors": sorted({error for _, error in rejected})[:5]
+        })
+    
+    async def _process_token_event(self, db_session: AsyncSession, header: _EventHeader, event_data: Dict):
+        """Apply a single decoded token event within the batch transaction."""
+        event_type, token_address, _, timestamp = header
+        
+        # Process different types of events
+        handler = self._HANDLERS.get(event_type)
+        if handler:
+            await handler(self, db_session, event_data, timestamp)
+        else:
+            logger.warning("Unknown event type", extra={
+                "event_type": event_type,
+                "token_address": token_address
+            })
     
     async def _process_transaction_event(self, db_session: AsyncSession, event_data: Dict, timestamp: datetime):
         """Process transaction events."""
@@ -180,29 +504,49 @@ class KafkaConsumerService:
         # Implementation for metrics processing
         pass
     
-    async def _store_analytics_event(self, db_session: AsyncSession, event_data: Dict, timestamp: datetime):
-        """Store raw analytics event for audit purposes."""
-        from app.models.market_data import AnalyticsEvent
+    # Event type -> handler, resolved with a single dict lookup per event
+    _HANDLERS = {
+        "transaction": _process_transaction_event,
+        "holder_update": _process_holder_event,
+        "metrics_update": _process_metrics_event,
+    }
+    
+    async def _store_analytics_events(
+        self,
+        db_session: AsyncSession,
+        events: List[_DecodedEvent]
+    ):
+        """
+        Store raw analytics events for audit purposes.
         
-        stmt = insert(AnalyticsEvent).values(
-            event_type=event_data.get("event_type"),
-            token_address=event_data.get("token_address"),
-            event_data=event_data,
-            source=event_data.get("source", "kafka"),
-            timestamp=timestamp
-        ).on_conflict_do_nothing()
+        Rows are streamed with COPY on the session's own asyncpg connection,
+        so they commit or roll back with the rest of the batch. The only unique
+        constraint is the freshly generated UUID key, so no conflict handling
+        is needed. event_data is the message payload as received, so the
+        decoded dict is never re-serialized.
+        """
+        records = [
+            (uuid4(), event_type, token_address, payload.decode('utf-8'), source, timestamp)
+            for (event_type, token_address, source, timestamp), _, payload in events
+        ]
         
-        await db_session.execute(stmt)
+        conn = await db_session.connection()
+        raw_conn = await conn.get_raw_connection()
+        await raw_conn.driver_connection.copy_records_to_table(
+            AnalyticsEvent.__tablename__,
+            records=records,
+            columns=_ANALYTICS_EVENT_COLUMNS,
+        )
     
     def get_processing_stats(self) -> Dict[str, Any]:
         """Get consumer processing statistics."""
-        stats = self._processing_stats.copy()
-        if stats["start_time"]:
-            runtime = datetime.now(timezone.utc) - stats["start_time"]
-            stats["runtime_seconds"] = runtime.total_seconds()
+        stats = dict(self._processing_stats)
+        if self._start_monotonic is not None:
+            # Monotonic clock: unaffected by wall-clock adjustments and cheaper than datetime math
+            runtime = time.monotonic() - self._start_monotonic
+            stats["runtime_seconds"] = runtime
             stats["messages_per_second"] = (
-                stats["messages_processed"] / runtime.total_seconds()
-                if runtime.total_seconds() > 0 else 0
+                stats["messages_processed"] / runtime if runtime > 0 else 0
             )
         return stats
     
@@ -3,12 +3,13 @@ Kafka producer service for publishing market data events.
 Handles publishing price events with error handling and retries.
 """
 
-import json
 import asyncio
+import time
 from datetime import datetime, timezone
 from typing import Dict, Any, Optional
 from uuid import uuid4
 
+import orjson
 from confluent_kafka import Producer
 from confluent_kafka.error import KafkaError, KafkaException
 
@@ -18,6 +19,12 @@ from typing import Dict, Any
 
 logger = get_logger(__name__)
 
+# Partition key for token events that carry no token address
+_UNKNOWN_KEY = b"unknown"
+
+# Seconds between delivery-report polls in the background drain loop
+_DRAIN_INTERVAL = 0.05
+
 
 class KafkaProducerService:
     """Kafka producer service for market data events."""
@@ -27,16 +34,19 @@ class KafkaProducerService:
         self.config = KafkaConfig.get_producer_config()
         self.topics = KafkaConfig.get_topics()
         self._running = False
+        self._poll_task: Optional[asyncio.Task] = None
         self._messages_sent = 0
         self._messages_failed = 0
         self._bytes_sent = 0
-        self._start_time = datetime.now(timezone.utc)
+        self._last_error: Optional[str] = None
+        self._start_monotonic = time.monotonic()
     
     async def start(self):
         """Initialize the Kafka producer."""
         try:
             self.producer = Producer(self.config)
             self._running = True
+            self._poll_task = asyncio.create_task(self._drain_loop())
             logger.info("Kafka producer started successfully")
             
         except Exception as e:
@@ -47,14 +57,28 @@ class KafkaProducerService:
         """Stop the Kafka producer and flush pending messages."""
         if self.producer:
             try:
+                self._running = False
+                if self._poll_task:
+                    self._poll_task.cancel()
+                    try:
+                        await self._poll_task
+                    except asyncio.CancelledError:
+                        pass
+                    self._poll_task = None
+                
                 # Wait for any outstanding messages to be delivered
                 self.producer.flush(timeout=10)
-                self._running = False
                 logger.info("Kafka producer stopped successfully")
                 
             except Exception as e:
                 logger.error("Error stopping Kafka producer", extra={"error": str(e)})
     
+    async def _drain_loop(self):
+        """Serve delivery reports in the background so produce() never has to poll."""
+        while self._running:
+            self.producer.poll(0)
+            await asyncio.sleep(_DRAIN_INTERVAL)
+    
     def _delivery_callback(self, err, msg):
         """Callback for message delivery confirmation."""
         if err is not None:
@@ -65,6 +89,7 @@ class KafkaProducerService:
                 "offset": msg.offset() if msg.offset() != -1 else "unknown"
             })
             self._messages_failed += 1
+            self._last_error = str(err)
         else:
             logger.debug("Message delivered successfully", extra={
                 "topic": msg.topic(),
@@ -93,23 +118,27 @@ class KafkaProducerService:
             logger.error("Producer not running")
             return False
         
+        token_address = token_data.get("token_address")
+        
         try:
             # Create the event message according to the specified schema
+            now = datetime.now(timezone.utc).isoformat()
+            event_id = str(uuid4())
             event = {
-                "token_address": token_data.get("token_address"),
+                "token_address": token_address,
                 "metrics": token_data.get("metrics", {}),
-                "timestamp": datetime.now(timezone.utc).isoformat(),
+                "timestamp": now,
                 "source": "token_analytics",
-                "raw_response_id": raw_response_id or str(uuid4()),
-                "event_id": str(uuid4()),
-                "published_at": datetime.now(timezone.utc).isoformat()
+                "raw_response_id": raw_response_id or event_id,
+                "event_id": event_id,
+                "published_at": now
             }
             
-            # Serialize the event
-            message = json.dumps(event, default=str)
+            # Serialize the event; orjson yields bytes that are produced as-is
+            message = orjson.dumps(event, default=str, option=orjson.OPT_NON_STR_KEYS)
             
-            # Use token address as the key for partitioning
-            key = token_data.get("token_address", "unknown")
+            # Use token address as the key for partitioning, handed over as bytes
+            key = token_address.encode('utf-8') if token_address else _UNKNOWN_KEY
             
             # Publish the message
             self.producer.produce(
@@ -119,11 +148,8 @@ class KafkaProducerService:
                 callback=self._delivery_callback
             )
             
-            # Trigger delivery (non-blocking)
-            self.producer.poll(0)
-            
             logger.info("Token event published", extra={
-                "token_address": token_data.get("token_address"),
+                "token_address": token_address,
                 "event_type": "token_analytics"
             })
             
@@ -131,14 +157,14 @@ class KafkaProducerService:
             
         except KafkaException as e:
             logger.error("Kafka error publishing token event", extra={
-                "token_address": token_data.get("token_address"),
+                "token_address": token_address,
                 "error": str(e)
             })
             return False
             
         except Exception as e:
             logger.error("Unexpected error publishing token event", extra={
-                "token_address": token_data.get("token_address"),
+                "token_address": token_address,
                 "error": str(e)
             })
             return False
@@ -172,7 +198,7 @@ class KafkaProducerService:
                 "error_id": str(uuid4())
             }
             
-            message = json.dumps(error_event, default=str)
+            message = orjson.dumps(error_event, default=str, option=orjson.OPT_NON_STR_KEYS)
             
             self.producer.produce(
                 topic=self.topics['errors'],
@@ -180,8 +206,6 @@ class KafkaProducerService:
                 callback=self._delivery_callback
             )
             
-            self.producer.poll(0)
-            
             logger.info("Error event published", extra={
                 "error_type": error_type,
                 "context": context
@@ -230,13 +254,13 @@ class KafkaProducerService:
                 return {
                     "messages_sent": self._messages_sent,
                     "messages_failed": self._messages_failed,
-                    "bytes_sent": getattr(self, '_bytes_sent', 0),
+                    "bytes_sent": self._bytes_sent,
                     "broker_count": len(metrics.brokers) if metrics.brokers else 0,
                     "topic_count": len(metrics.topics) if metrics.topics else 0,
                     "producer_queue_size": len(self.producer) if hasattr(self.producer, '__len__') else 0,
                     "is_connected": self.producer is not None,
-                    "last_error": getattr(self, '_last_error', None),
-                    "uptime_seconds": (datetime.now(timezone.utc) - self._start_time).total_seconds() if hasattr(self, '_start_time') else 0
+                    "last_error": self._last_error,
+                    "uptime_seconds": time.monotonic() - self._start_monotonic
                 }
             else:
                 return {
@@ -255,8 +279,8 @@ class KafkaProducerService:
             logger.error("Error getting producer metrics", extra={"error": str(e)})
             return {
                 "error": str(e),
-                "messages_sent": getattr(self, '_messages_sent', 0),
-                "messages_failed": getattr(self, '_messages_failed', 0),
+                "messages_sent": self._messages_sent,
+                "messages_failed": self._messages_failed,
                 "is_connected": False
             }
 
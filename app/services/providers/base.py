@@ -28,9 +28,9 @@ class ProviderUnavailableError(MarketDataProviderError):
     pass
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class PriceData:
-    """Data class for price information."""
+    """Immutable, slotted record of a price observation."""
     symbol: str
     price: float
     timestamp: datetime
@@ -2,6 +2,7 @@
 Provider factory for creating market data provider instances.
 """
 
+from functools import lru_cache
 from typing import Dict, Type
 from app.services.providers.base import BaseMarketDataProvider
 from app.services.providers.helius import HeliusProvider
@@ -35,11 +36,21 @@ def get_provider(provider_name: str) -> BaseMarketDataProvider:
     return provider_class()
 
 
+@lru_cache(maxsize=1)
 def get_default_provider() -> BaseMarketDataProvider:
-    """Get the default provider instance."""
+    """Get the default provider instance (created once and shared)."""
     return get_provider(DEFAULT_PROVIDER)
 
 
+async def shutdown_providers():
+    """Close the shared default provider if one was created."""
+    if get_default_provider.cache_info().currsize:
+        provider = get_default_provider()
+        aclose = getattr(provider, "aclose", None)
+        if aclose:
+            await aclose()
+
+
 def get_available_providers() -> list[str]:
     """Get list of available provider names."""
     return list(PROVIDERS.keys()) 
\ No newline at end of file
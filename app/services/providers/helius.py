@@ -2,9 +2,13 @@
 Helius provider for Solana token market data.
 """
 
+import asyncio
+import re
+import time
 from datetime import datetime, timezone
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, Tuple
 
+from app.core.singleflight import SingleFlight
 from app.services.providers.base import (
     BaseMarketDataProvider, PriceData, 
     SymbolNotFoundError, RateLimitError, ProviderUnavailableError
@@ -12,39 +16,98 @@ from app.services.providers.base import (
 from app.services.solana.helius_client import HeliusRPCClient
 
 
+_SUPPORTED_SYMBOLS = (
+    "So11111111111111111111111111111111111111112",  # SOL
+    "DezXAZ8z7PnrnRJjz3wXBoRgixCa6xjnB7YaB1pPB263",  # BONK
+    "EKpQGSJtjMFqKZ9KQanSqYXRcF8fBopzLHYxdM65zcjm",  # WIF
+    "4k3Dyjzvzp8eMZWUXbBCjEvwSkkk59S5iCNLY3QrkX6R",  # RAY
+)
+_SUPPORTED_SET = frozenset(_SUPPORTED_SYMBOLS)
+
+# Base58 Solana address (32-44 chars, no 0/O/I/l); a single anchored character
+# class cannot backtrack, so the stdlib engine matches in linear time
+_SOLANA_ADDRESS_RE = re.compile(r'[1-9A-HJ-NP-Za-km-z]{32,44}')
+
+# Prices are reused for a short window so bursts of identical lookups hit the RPC once
+_PRICE_TTL_SECONDS = 2.0
+_PRICE_CACHE_MAX_SIZE = 10_000
+
+
 class HeliusProvider(BaseMarketDataProvider):
     """Helius API provider for Solana token data."""
     
     def __init__(self):
         super().__init__("helius")
+        # One keep-alive HTTP session is opened lazily and reused for every call
         self.client = HeliusRPCClient()
+        self._started = False
+        self._start_lock = asyncio.Lock()
+        self._price_cache: Dict[str, Tuple[float, PriceData]] = {}
+        self._inflight = SingleFlight()
+    
+    async def _ensure_started(self) -> HeliusRPCClient:
+        """Open the shared client session on first use."""
+        if not self._started:
+            async with self._start_lock:
+                if not self._started:
+                    await self.client.__aenter__()
+                    self._started = True
+        return self.client
+    
+    async def aclose(self):
+        """Close the shared client session."""
+        async with self._start_lock:
+            if self._started:
+                await self.client.__aexit__(None, None, None)
+                self._started = False
     
     async def get_latest_price(self, symbol: str) -> PriceData:
         """Get the latest price for a token symbol."""
+        # Convert symbol to token address lookup (this would need a symbol->address mapping)
+        # For now, treat symbol as address if it looks like a Solana address
+        token_address = symbol if _SOLANA_ADDRESS_RE.fullmatch(symbol) else None
+        
+        if not token_address:
+            raise SymbolNotFoundError(f"Cannot resolve symbol to token address: {symbol}")
+        
+        cached = self._price_cache.get(token_address)
+        if cached is not None and cached[0] > time.monotonic():
+            return cached[1]
+        
+        # Concurrent misses for the same token share a single upstream request
+        return await self._inflight.run(token_address, lambda: self._load_price(symbol, token_address))
+    
+    async def _load_price(self, symbol: str, token_address: str) -> PriceData:
+        """Fetch a price from Helius and cache it."""
+        price = await self._fetch_price(symbol, token_address)
+        self._store_price(token_address, price)
+        return price
+    
+    def _store_price(self, token_address: str, price: PriceData):
+        """Cache a price for the TTL window, evicting the oldest entry when full."""
+        if len(self._price_cache) >= _PRICE_CACHE_MAX_SIZE and token_address not in self._price_cache:
+            del self._price_cache[next(iter(self._price_cache))]
+        self._price_cache[token_address] = (time.monotonic() + _PRICE_TTL_SECONDS, price)
+    
+    async def _fetch_price(self, symbol: str, token_address: str) -> PriceData:
+        """Fetch a fresh price from the upstream API."""
         try:
-            # Use the actual Helius client integration
-            async with self.client as client:
-                # Convert symbol to token address lookup (this would need a symbol->address mapping)
-                # For now, treat symbol as address if it looks like a Solana address
-                token_address = symbol if len(symbol) > 32 else None
-                
-                if not token_address:
-                    raise SymbolNotFoundError(f"Cannot resolve symbol to token address: {symbol}")
-                
-                # Get real price data from Jupiter via Helius
-                price_data = await client.get_token_price_jupiter(token_address)
-                
-                if not price_data:
-                    raise SymbolNotFoundError(f"Token price not found: {symbol}")
-                
-                return PriceData(
-                    symbol=symbol.upper(),
-                    price=price_data["price"],
-                    timestamp=price_data["timestamp"],
-                    provider=self.name,
-                    volume=None,  # Volume would come from transaction analysis
-                    raw_data=price_data
-                )
+            client = await self._ensure_started()
+            
+            # Get real price data from Jupiter via Helius
+            price_data = await client.get_token_price_jupiter(token_address)
+            
+            if not price_data:
+                raise SymbolNotFoundError(f"Token price not found: {symbol}")
+            
+            return PriceData(
+                symbol=symbol.upper(),
+                price=price_data["price"],
+                timestamp=price_data["timestamp"],
+                provider=self.name,
+                volume=None,  # Volume would come from transaction analysis
+                raw_data=price_data
+            )
                 
         except SymbolNotFoundError:
             raise
@@ -60,18 +123,17 @@ class HeliusProvider(BaseMarketDataProvider):
         """Check if the Helius provider is available."""
         try:
             # Test with a known token address (SOL)
-            async with self.client as client:
-                test_result = await client.get_token_price_jupiter("So11111111111111111111111111111111111111112")
-                return test_result is not None
+            client = await self._ensure_started()
+            test_result = await client.get_token_price_jupiter("So11111111111111111111111111111111111111112")
+            return test_result is not None
         except Exception:
             return False
     
     async def get_supported_symbols(self) -> list[str]:
         """Get list of supported symbols."""
         # Return common Solana token addresses instead of symbols
-        return [
-            "So11111111111111111111111111111111111111112",  # SOL
-            "DezXAZ8z7PnrnRJjz3wXBoRgixCa6xjnB7YaB1pPB263",  # BONK
-            "EKpQGSJtjMFqKZ9KQanSqYXRcF8fBopzLHYxdM65zcjm",  # WIF
-            "4k3Dyjzvzp8eMZWUXbBCjEvwSkkk59S5iCNLY3QrkX6R",  # RAY
-        ] 
\ No newline at end of file
+        return list(_SUPPORTED_SYMBOLS)
+    
+    def is_supported(self, address: str) -> bool:
+        """Check whether a token address is in the supported set."""
+        return address in _SUPPORTED_SET
@@ -4,16 +4,30 @@ Implements core Solana RPC methods with Helius infrastructure for improved relia
 """
 
 import asyncio
-import json
+import contextlib
+import functools
+import heapq
+import importlib.util
+import itertools
+import logging
+import random
+import re
+import time
+import zlib
+from array import array
 from datetime import datetime, timezone, timedelta
-from typing import Dict, Any, List, Optional, Union
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple, Union
 from decimal import Decimal
 
 import httpx
+import orjson
 from solders.pubkey import Pubkey
 
 from app.core.config import settings
 from app.core.logging import get_logger
+from app.core.singleflight import SingleFlight
+from app.core.ttl_cache import TTLCache
+from app.services.cache import cache
 
 logger = get_logger(__name__)
 
@@ -33,6 +47,292 @@ class RateLimitError(SolanaRPCError):
     pass
 
 
+# Constant RPC option objects, built once and shared by every request.
+# They are only ever serialized, never mutated; calls needing different
+# values merge them into a new dict.
+_FINALIZED = {"commitment": "finalized"}
+_JSON_PARSED_FINALIZED = {"encoding": "jsonParsed", "commitment": "finalized"}
+_TRANSACTION_PARAMS = {
+    "encoding": "jsonParsed",
+    "commitment": "finalized",
+    "maxSupportedTransactionVersion": 0
+}
+_BLOCK_PARAMS = {
+    "encoding": "jsonParsed",
+    "commitment": "finalized",
+    "transactionDetails": "signatures",
+    "rewards": False
+}
+
+
+@functools.lru_cache(maxsize=4096)
+def _validate_mint(mint: str) -> str:
+    """Check a mint address parses as a public key; repeat addresses skip the parse."""
+    Pubkey.from_string(mint)
+    return mint
+
+
+class _TokenBucket:
+    """
+    Token-bucket rate limiter shared by every Helius client.
+    
+    Callers reserve tokens up front and sleep until their reservation is
+    covered, so concurrent requests are paced in arrival order without a lock
+    and bursts up to the bucket capacity go out immediately.
+    """
+    
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        self._rate = rate
+        self._capacity = capacity if capacity is not None else rate
+        self._tokens = self._capacity
+        self._updated = time.monotonic()
+    
+    async def acquire(self, tokens: int = 1):
+        """Wait until `tokens` requests may be sent."""
+        now = time.monotonic()
+        self._tokens = min(self._capacity, self._tokens + (now - self._updated) * self._rate)
+        self._updated = now
+        self._tokens -= tokens
+        if self._tokens < 0:
+            await asyncio.sleep(-self._tokens / self._rate)
+
+
+# Global limiter pacing all Helius RPC traffic from this process
+_rate_limiter = _TokenBucket(settings.helius_rps)
+
+# Backoff after a rate-limited request: base * 2**attempt seconds (with jitter), capped
+_BACKOFF_BASE_SECONDS = 0.5
+_BACKOFF_MAX_SECONDS = 8.0
+
+
+# httpx only speaks HTTP/2 with the optional h2 package (httpx[http2]). Without
+# it, fall back to HTTP/1.1 and widen the pool, since each connection then
+# carries a single in-flight request. ALPN negotiation handles servers that
+# do not offer h2.
+_HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+_HTTP1_POOL_FACTOR = 2
+
+
+# getTokenAccountBalance is the hottest call, so its envelope is prebuilt and
+# only the account and id are spliced in. Base58 has no characters that need
+# JSON escaping; anything else goes through orjson.
+_BALANCE_ENVELOPE_PREFIX = b'{"jsonrpc":"2.0","method":"getTokenAccountBalance","params":["'
+_BALANCE_ENVELOPE_SUFFIX = b'",{"commitment":"finalized"}],"id":'
+_BASE58_RE = re.compile(r"[1-9A-HJ-NP-Za-km-z]{32,44}")
+
+
+def _encode_rpc_call(request_id: int, method: str, params: Union[List[Any], Dict[str, Any]]) -> bytes:
+    """Serialize one JSON-RPC 2.0 call."""
+    if (
+        method == "getTokenAccountBalance"
+        and len(params) == 2
+        and params[1] is _FINALIZED
+        and _BASE58_RE.fullmatch(params[0])
+    ):
+        return b"".join((
+            _BALANCE_ENVELOPE_PREFIX, params[0].encode(), _BALANCE_ENVELOPE_SUFFIX,
+            str(request_id).encode(), b"}"
+        ))
+    return orjson.dumps({"jsonrpc": "2.0", "id": request_id, "method": method, "params": params})
+
+
+# Batch responses are requested gzip-only so the raw body can be inflated
+# here; bodies at least this large are inflated in a worker thread (zlib
+# releases the GIL), keeping the event loop free. orjson holds the GIL
+# while parsing, so parsing stays on the loop.
+_BATCH_HEADERS = {"Content-Type": "application/json", "Accept-Encoding": "gzip"}
+_INFLATE_IN_THREAD_BYTES = 32 * 1024
+
+
+async def _inflate(raw: bytes, encoding: str) -> bytes:
+    """Decompress a raw response body according to its Content-Encoding."""
+    if encoding != "gzip":
+        return raw
+    if len(raw) < _INFLATE_IN_THREAD_BYTES:
+        return zlib.decompress(raw, 16 + zlib.MAX_WBITS)
+    return await asyncio.to_thread(zlib.decompress, raw, 16 + zlib.MAX_WBITS)
+
+
+# Most accounts getMultipleAccounts accepts per call
+_MULTIPLE_ACCOUNTS_LIMIT = 100
+
+# getAsset calls per JSON-RPC batch when fetching metadata for many mints; small
+# batches sent concurrently keep one slow asset from holding up the rest
+_METADATA_BATCH_SIZE = 20
+
+# Concurrent getTokenAccountBalance calls are collected for up to this many
+# seconds (or until the batch is full) and sent as one JSON-RPC batch
+_BALANCE_BATCH_WINDOW = 0.005
+_BALANCE_BATCH_MAX = 100
+
+# Token metadata and supply caches. getAsset also carries price and supply,
+# so its TTL matches the supply TTL rather than treating it as immutable.
+_supply_cache = TTLCache("token_supply", ttl=30)
+_metadata_cache = TTLCache("token_metadata", ttl=30)
+
+# Token account balances move every few slots; a short TTL absorbs polling bursts
+_balance_cache = TTLCache(
+    "token_account_balance", ttl=settings.helius_balance_ttl_ms / 1000
+)
+_BALANCE_CACHE_ENABLED = settings.helius_balance_ttl_ms > 0
+
+def invalidate_token_caches(token_mint: str):
+    """Drop cached supply and metadata for a mint, e.g. after an on-chain change."""
+    _supply_cache.pop(token_mint)
+    _metadata_cache.pop(token_mint)
+
+
+# Accounts the RPC rejected as invalid or missing. Only TokenNotFoundError is
+# remembered; transport and server errors are transient and always retried.
+_invalid_account_cache = TTLCache("invalid_token_account", ttl=30)
+
+
+# Finalized transactions never change, so they are also kept in Redis where
+# they survive restarts and are shared by API and worker processes
+_PERSISTENT_CACHE_TTL = settings.helius_persistent_cache_ttl
+
+
+async def _persistent_get(key: str) -> Optional[Any]:
+    """Read a response from the Redis cache; None if absent or Redis is unavailable."""
+    if not _PERSISTENT_CACHE_TTL or not cache.is_connected:
+        return None
+    try:
+        raw = await cache.redis.get(key)
+        # A corrupt entry is treated as a miss and overwritten by the next store
+        return orjson.loads(raw) if raw is not None else None
+    except Exception as e:
+        logger.warning("Helius persistent cache read failed", extra={"key": key, "error": str(e)})
+        return None
+
+
+async def _persistent_set(key: str, value: Any):
+    """Store a response in the Redis cache, ignoring Redis failures."""
+    if not _PERSISTENT_CACHE_TTL or not cache.is_connected:
+        return
+    try:
+        await cache.redis.setex(key, _PERSISTENT_CACHE_TTL, orjson.dumps(value))
+    except Exception as e:
+        logger.warning("Helius persistent cache write failed", extra={"key": key, "error": str(e)})
+
+
+# In-flight loads shared by concurrent callers, keyed by (namespace, key)
+_inflight_loads = SingleFlight()
+
+# Read-only RPC methods whose identical concurrent calls can share one request
+_COALESCED_METHODS = frozenset({
+    "getTokenSupply",
+    "getTokenLargestAccounts",
+    "getAccountInfo",
+    "getMultipleAccounts",
+    "getTransaction",
+    "getAsset",
+    "getBlock",
+})
+
+
+def _balance_from_token_amount(value: Dict[str, Any]) -> Dict[str, Any]:
+    """Build a balance dict from an RPC tokenAmount / getTokenAccountBalance value."""
+    amount = value.get("amount", "0")
+    amount_raw = int(amount)
+    decimals = int(value.get("decimals", 9))
+    return {
+        # Derived from the exact integer amount rather than the rounded uiAmount
+        "balance": amount_raw / 10 ** decimals,
+        "amount": amount,
+        "amount_raw": amount_raw,
+        "decimals": decimals,
+        "ui_amount_string": value.get("uiAmountString", "0")
+    }
+
+
+def _metadata_from_asset(token_mint: str, result: Dict[str, Any]) -> Dict[str, Any]:
+    """Build a token metadata dict from a DAS getAsset result."""
+    # Extract metadata from DAS response
+    content = result.get("content", {})
+    metadata = content.get("metadata", {})
+    token_info = result.get("token_info", {})
+    
+    # Get name and symbol from metadata
+    name = metadata.get("name", "").strip()
+    symbol = metadata.get("symbol", "").strip()
+    
+    # Clean up empty strings
+    name = name if name and name != "" else None
+    symbol = symbol if symbol and symbol != "" else None
+    
+    # Get token info
+    supply = token_info.get("supply", 0)
+    decimals = token_info.get("decimals", 9)
+    mint_authority = token_info.get("mint_authority")
+    freeze_authority = token_info.get("freeze_authority")
+    
+    # Get price info if available
+    price_info = token_info.get("price_info", {})
+    price_per_token = price_info.get("price_per_token")
+    price_currency = price_info.get("currency")
+    
+    # Additional metadata
+    description = metadata.get("description", "").strip()
+    description = description if description and description != "" else None
+    
+    # Get links and image
+    links = content.get("links", {})
+    image_url = links.get("image")
+    external_url = links.get("external_url")
+    
+    # Get collection info if available
+    grouping = result.get("grouping", [])
+    collection_address = None
+    for group in grouping:
+        if group.get("group_key") == "collection":
+            collection_address = group.get("group_value")
+            break
+    
+    return {
+        "address": token_mint,
+        "name": name,
+        "symbol": symbol,
+        "description": description,
+        "decimals": decimals,
+        "supply": supply,
+        "mint_authority": mint_authority,
+        "freeze_authority": freeze_authority,
+        "image_url": image_url,
+        "external_url": external_url,
+        "collection_address": collection_address,
+        "token_standard": metadata.get("token_standard"),
+        "is_mutable": result.get("mutable", False),
+        "is_burnt": result.get("burnt", False),
+        "price_per_token": price_per_token,
+        "price_currency": price_currency,
+        "metadata_source": "helius_das_getasset"
+    }
+
+
+async def _cached_load(cache: TTLCache, key: str, loader: Callable[[], Awaitable[Any]]) -> Any:
+    """
+    Serve key from cache, or run loader once for all concurrent callers on a miss.
+    
+    None results are returned but not cached.
+    """
+    value = cache.get(key)
+    if value is not None:
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Helius cache hit", extra={"cache": cache.name, "hits": cache.hits, "misses": cache.misses})
+        return value
+    
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("Helius cache miss", extra={"cache": cache.name, "hits": cache.hits, "misses": cache.misses})
+    
+    async def load_and_store():
+        loaded = await loader()
+        if loaded is not None:
+            cache.set(key, loaded)
+        return loaded
+    
+    return await _inflight_loads.run((cache.name, key), load_and_store)
+
+
 class HeliusRPCClient:
     """
     Helius-enhanced Solana RPC client implementing core methods for token analytics.
@@ -49,59 +349,148 @@ class HeliusRPCClient:
     Plus WebSocket subscriptions for real-time updates.
     """
     
+    _shared_session: Optional[httpx.AsyncClient] = None
+    _session_loop: Optional[asyncio.AbstractEventLoop] = None
+    # Caps in-flight HTTP requests; bound to the same event loop as the session
+    _rpc_semaphore: Optional[asyncio.Semaphore] = None
+    
     def __init__(self):
         self.api_key = settings.helius_api_key
         self.rpc_url = f"{settings.helius_rpc_url}?api-key={self.api_key}"
         self.websocket_url = f"{settings.helius_websocket_url}?api-key={self.api_key}"
         
         self.session: Optional[httpx.AsyncClient] = None
-        self._request_id = 0
+        self._request_ids = itertools.count(1)
+        
+        # Balance micro-batching state (see _enqueue_balance)
+        self._balance_batch: List[Tuple[str, asyncio.Future]] = []
+        self._balance_flush: Optional[asyncio.TimerHandle] = None
+        self._balance_tasks: set = set()
         
         if not self.api_key:
             raise ValueError("Helius API key is required")
     
+    @classmethod
+    def get_session(cls) -> httpx.AsyncClient:
+        """
+        Get the process-wide HTTP client, creating it on first use.
+        
+        Connections are kept alive and multiplexed over HTTP/2 (when h2 is
+        installed) across every HeliusRPCClient instance. A new client is
+        created if the previous one was closed or belongs to a different event
+        loop (Celery tasks run each job in its own loop).
+        """
+        loop = asyncio.get_running_loop()
+        if cls._shared_session is None or cls._shared_session.is_closed or cls._session_loop is not loop:
+            cls._discard_session()
+            # All traffic goes to the single Helius host, so the pool limit is
+            # effectively per host; keep every pooled connection warm
+            max_connections = settings.helius_max_connections
+            if not _HTTP2_AVAILABLE:
+                max_connections *= _HTTP1_POOL_FACTOR
+            # Binding to 0.0.0.0 restricts resolution and connects to IPv4,
+            # avoiding slow IPv6 fallback on hosts without IPv6 routing
+            transport = httpx.AsyncHTTPTransport(
+                http2=_HTTP2_AVAILABLE,
+                limits=httpx.Limits(
+                    max_keepalive_connections=max_connections,
+                    max_connections=max_connections,
+                    keepalive_expiry=settings.helius_keepalive_expiry
+                ),
+                local_address="0.0.0.0" if settings.helius_force_ipv4 else None
+            )
+            cls._shared_session = httpx.AsyncClient(
+                transport=transport,
+                timeout=httpx.Timeout(30.0, connect=settings.helius_connect_timeout)
+            )
+            cls._rpc_semaphore = asyncio.Semaphore(settings.helius_max_concurrent_rpc)
+            cls._session_loop = loop
+        return cls._shared_session
+    
+    @classmethod
+    def _discard_session(cls):
+        """
+        Drop a session bound to another event loop before replacing it.
+        
+        Its connections can only be closed on their own loop: that is done
+        here when the loop is still running, and by close_session() at the
+        end of each Celery task otherwise.
+        """
+        session, old_loop = cls._shared_session, cls._session_loop
+        cls._shared_session, cls._session_loop = None, None
+        if session is None or session.is_closed or old_loop is None:
+            return
+        if old_loop.is_running() and not old_loop.is_closed():
+            asyncio.run_coroutine_threadsafe(session.aclose(), old_loop)
+        else:
+            logger.warning("Discarding Helius HTTP session from a finished event loop without closing it")
+    
+    @classmethod
+    async def close_session(cls):
+        """Close the process-wide HTTP client (application shutdown)."""
+        session, cls._shared_session, cls._session_loop = cls._shared_session, None, None
+        cls._rpc_semaphore = None
+        if session is not None and not session.is_closed:
+            await session.aclose()
+    
     async def __aenter__(self):
         """Async context manager entry."""
-        self.session = httpx.AsyncClient(
-            timeout=30.0,
-            limits=httpx.Limits(max_keepalive_connections=20, max_connections=50)
-        )
+        self.session = type(self).get_session()
         return self
     
     async def __aexit__(self, exc_type, exc_val, exc_tb):
-        """Async context manager exit."""
-        if self.session:
-            await self.session.aclose()
-    
-    def _get_request_id(self) -> int:
-        """Get next request ID for RPC calls."""
-        self._request_id += 1
-        return self._request_id
+        """Async context manager exit; the shared session stays open for reuse."""
+        self.session = None
     
     async def _make_rpc_request(self, method: str, params: Union[List[Any], Dict[str, Any]]) -> Dict[str, Any]:
-        """Make a JSON-RPC request to Helius."""
-        if not self.session:
-            raise SolanaRPCError("Client session not initialized")
+        """
+        Make a JSON-RPC request to Helius.
         
-        payload = {
-            "jsonrpc": "2.0",
-            "id": self._get_request_id(),
-            "method": method,
-            "params": params
-        }
-        print(f'=======================\nPayload for {method}\n{payload}\n\n========================')
+        Identical concurrent calls to read-only methods share a single request.
+        """
+        if method in _COALESCED_METHODS:
+            key = (method, orjson.dumps(params, option=orjson.OPT_SORT_KEYS).decode())
+            return await _inflight_loads.run(key, lambda: self._request_with_retry(method, params))
+        return await self._request_with_retry(method, params)
+    
+    async def _request_with_retry(self, method: str, params: Union[List[Any], Dict[str, Any]]) -> Dict[str, Any]:
+        """Send a JSON-RPC request, backing off and retrying when rate limited."""
+        for attempt in range(settings.helius_max_retries + 1):
+            try:
+                return await self._send_rpc_request(method, params)
+            except RateLimitError:
+                if attempt >= settings.helius_max_retries:
+                    raise
+                delay = min(_BACKOFF_MAX_SECONDS, _BACKOFF_BASE_SECONDS * 2 ** attempt)
+                delay *= random.uniform(0.5, 1.5)
+                logger.warning("Backing off after RPC rate limit", extra={
+                    "method": method,
+                    "attempt": attempt + 1,
+                    "delay_seconds": round(delay, 3)
+                })
+                await asyncio.sleep(delay)
+    
+    async def _send_rpc_request(self, method: str, params: Union[List[Any], Dict[str, Any]]) -> Dict[str, Any]:
+        """Send a single JSON-RPC request to Helius."""
+        await _rate_limiter.acquire()
+        session = type(self).get_session()
+        semaphore = type(self)._rpc_semaphore
+        
+        request_id = next(self._request_ids)
         
         try:
-            logger.debug("Making RPC request", extra={
-                "method": method,
-                "request_id": payload["id"]
-            })
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Making RPC request", extra={
+                    "method": method,
+                    "request_id": request_id
+                })
             
-            response = await self.session.post(
-                self.rpc_url,
-                json=payload,
-                headers={"Content-Type": "application/json"}
-            )
+            async with semaphore:
+                response = await session.post(
+                    self.rpc_url,
+                    content=_encode_rpc_call(request_id, method, params),
+                    headers={"Content-Type": "application/json"}
+                )
             
             # Handle rate limiting
             if response.status_code == 429:
@@ -109,27 +498,18 @@ class HeliusRPCClient:
                 raise RateLimitError(f"Rate limit exceeded for {method}")
             
             response.raise_for_status()
-            result = response.json()
-
-            print(f'******************\nResult for {method}\n{result}\n\n******************')
+            result = orjson.loads(response.content)
             
-            if "error" in result:
-                error = result["error"]
-                error_code = error.get("code", 0)
-                error_message = error.get("message", "Unknown error")
-                
-                logger.error("RPC error", extra={
+            # Only the size is logged; response bodies can be megabytes
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("RPC response received", extra={
                     "method": method,
-                    "error_code": error_code,
-                    "error_message": error_message
+                    "request_id": request_id,
+                    "response_bytes": len(response.content)
                 })
-                
-                if "not found" in error_message.lower() or error_code == -32602:
-                    raise TokenNotFoundError(f"Resource not found: {error_message}")
-                elif "rate" in error_message.lower() or error_code == -32600:
-                    raise RateLimitError(f"Rate limit: {error_message}")
-                else:
-                    raise SolanaRPCError(f"RPC error {error_code}: {error_message}")
+            
+            if "error" in result:
+                raise self._classify_rpc_error(method, result["error"])
             
             return result.get("result", {})
             
@@ -147,11 +527,192 @@ class HeliusRPCClient:
             })
             raise SolanaRPCError(f"Request error: {str(e)}")
     
+    def _classify_rpc_error(self, method: str, error: Dict[str, Any]) -> SolanaRPCError:
+        """Map a JSON-RPC error object onto the client's exception types."""
+        error_code = error.get("code", 0)
+        error_message = error.get("message", "Unknown error")
+        
+        logger.error("RPC error", extra={
+            "method": method,
+            "error_code": error_code,
+            "error_message": error_message
+        })
+        
+        if "not found" in error_message.lower() or error_code == -32602:
+            return TokenNotFoundError(f"Resource not found: {error_message}")
+        elif "rate" in error_message.lower() or error_code == -32600:
+            return RateLimitError(f"Rate limit: {error_message}")
+        else:
+            return SolanaRPCError(f"RPC error {error_code}: {error_message}")
+    
+    async def _make_rpc_batch(
+        self,
+        calls: List[Tuple[str, Union[List[Any], Dict[str, Any]]]],
+        return_exceptions: bool = False
+    ) -> List[Any]:
+        """
+        Send several JSON-RPC calls in a single HTTP request (JSON-RPC 2.0 batch).
+        
+        Args:
+            calls: (method, params) pairs
+            return_exceptions: Like asyncio.gather, place per-call errors in the
+                result list instead of raising the first one
+            
+        Returns:
+            Results in the order the calls were given
+        """
+        if not calls:
+            return []
+        
+        # Each call in the batch counts against the request budget
+        await _rate_limiter.acquire(len(calls))
+        session = type(self).get_session()
+        semaphore = type(self)._rpc_semaphore
+        
+        request_ids = self._request_ids
+        requests = [(next(request_ids), method, params) for method, params in calls]
+        
+        try:
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Making RPC batch request", extra={
+                    "calls": len(requests),
+                    "first_request_id": requests[0][0]
+                })
+            
+            # Read the body undecoded so large gzip bodies can be inflated off the loop
+            async with semaphore, session.stream(
+                "POST",
+                self.rpc_url,
+                content=b"[" + b",".join([_encode_rpc_call(*request) for request in requests]) + b"]",
+                headers=_BATCH_HEADERS
+            ) as response:
+                if response.status_code == 429:
+                    logger.warning("RPC rate limit exceeded", extra={"method": "batch", "calls": len(requests)})
+                    raise RateLimitError(f"Rate limit exceeded for batch of {len(requests)} calls")
+                
+                response.raise_for_status()
+                raw = b"".join([chunk async for chunk in response.aiter_raw()])
+                encoding = response.headers.get("content-encoding", "")
+            
+            body = orjson.loads(await _inflate(raw, encoding))
+            
+        except httpx.HTTPStatusError as e:
+            logger.error("HTTP error in RPC batch request", extra={
+                "calls": len(requests),
+                "status_code": e.response.status_code
+            })
+            raise SolanaRPCError(f"HTTP error {e.response.status_code}")
+        
+        except httpx.RequestError as e:
+            logger.error("Request error in RPC batch", extra={
+                "calls": len(requests),
+                "error": str(e)
+            })
+            raise SolanaRPCError(f"Request error: {str(e)}")
+        
+        if isinstance(body, dict):
+            # A whole-batch failure comes back as a single error object
+            raise self._classify_rpc_error("batch", body.get("error", {}))
+        
+        # Servers may reorder batch responses, so match them up by id
+        responses = {item.get("id"): item for item in body}
+        
+        results = []
+        for request_id, method, _ in requests:
+            item = responses.get(request_id)
+            if item is None:
+                outcome = SolanaRPCError(f"No response for {method} (id {request_id})")
+            elif "error" in item:
+                outcome = self._classify_rpc_error(method, item["error"])
+            else:
+                results.append(item.get("result", {}))
+                continue
+            
+            if not return_exceptions:
+                raise outcome
+            results.append(outcome)
+        
+        return results
+    
+    def _enqueue_balance(self, token_account: str) -> asyncio.Future:
+        """
+        Queue a getTokenAccountBalance call for the next micro-batch.
+        
+        Calls arriving within _BALANCE_BATCH_WINDOW of each other share one
+        HTTP request; a full batch is sent immediately.
+        
+        Returns:
+            Future resolved with the call's RPC result
+        """
+        loop = asyncio.get_running_loop()
+        if self._balance_batch and self._balance_batch[0][1].get_loop() is not loop:
+            # Left over from a finished event loop; its timer will never fire
+            self._balance_batch = []
+            self._balance_flush = None
+        
+        future = loop.create_future()
+        self._balance_batch.append((token_account, future))
+        
+        if len(self._balance_batch) >= _BALANCE_BATCH_MAX:
+            self._flush_balance_batch()
+        elif self._balance_flush is None:
+            self._balance_flush = loop.call_later(_BALANCE_BATCH_WINDOW, self._flush_balance_batch)
+        return future
+    
+    def _flush_balance_batch(self):
+        """Send the pending balance calls in the background."""
+        if self._balance_flush is not None:
+            self._balance_flush.cancel()
+            self._balance_flush = None
+        
+        batch, self._balance_batch = self._balance_batch, []
+        if batch:
+            task = asyncio.get_running_loop().create_task(self._send_balance_batch(batch))
+            self._balance_tasks.add(task)
+            task.add_done_callback(self._balance_tasks.discard)
+    
+    def _cancel_pending_balances(self):
+        """Cancel queued and in-flight balance batches (client teardown)."""
+        if self._balance_flush is not None:
+            self._balance_flush.cancel()
+            self._balance_flush = None
+        batch, self._balance_batch = self._balance_batch, []
+        for _, future in batch:
+            future.cancel()
+        for task in list(self._balance_tasks):
+            task.cancel()
+        self._balance_tasks.clear()
+    
+    async def _send_balance_batch(self, batch: List[Tuple[str, asyncio.Future]]):
+        """Resolve each queued future from a single batched RPC request."""
+        try:
+            if len(batch) == 1:
+                # Nothing to batch; keep the single-call retry behaviour
+                results = [await self._make_rpc_request(
+                    "getTokenAccountBalance", [batch[0][0], _FINALIZED]
+                )]
+            else:
+                results = await self._make_rpc_batch(
+                    [("getTokenAccountBalance", [account, _FINALIZED]) for account, _ in batch],
+                    return_exceptions=True
+                )
+        except Exception as e:
+            results = [e] * len(batch)
+        
+        for (_, future), result in zip(batch, results):
+            if future.done():
+                # Caller was cancelled while waiting
+                continue
+            if isinstance(result, Exception):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+    
     # Core Token Supply and Metadata Methods
     
     async def get_token_supply(self, token_mint: str) -> Dict[str, Any]:
         """
-        Get token supply information.
+        Get token supply information (cached briefly per mint).
         
         Args:
             token_mint: Token mint address
@@ -159,9 +720,12 @@ class HeliusRPCClient:
         Returns:
             Dict with token supply data including amount, decimals, uiAmount
         """
+        return await _cached_load(_supply_cache, token_mint, lambda: self._fetch_token_supply(token_mint))
+    
+    async def _fetch_token_supply(self, token_mint: str) -> Dict[str, Any]:
+        """Fetch token supply from the RPC."""
         try:
-            pubkey = Pubkey.from_string(token_mint)
-            result = await self._make_rpc_request("getTokenSupply", [str(pubkey)])
+            result = await self._make_rpc_request("getTokenSupply", [_validate_mint(token_mint)])
             
             value = result.get("value", {})
             return {
@@ -206,6 +770,39 @@ class HeliusRPCClient:
             })
             raise
     
+    async def get_multiple_accounts(
+        self,
+        addresses: List[str],
+        encoding: str = "jsonParsed"
+    ) -> List[Optional[Dict[str, Any]]]:
+        """
+        Get information for several accounts in one RPC call.
+        
+        Args:
+            addresses: Account addresses to query (max _MULTIPLE_ACCOUNTS_LIMIT per call)
+            encoding: Data encoding ("jsonParsed", "base58", "base64")
+            
+        Returns:
+            List of account information, index-aligned with addresses
+            (None for accounts that do not exist)
+        """
+        if not addresses:
+            return []
+        
+        try:
+            options = _JSON_PARSED_FINALIZED if encoding == "jsonParsed" else {**_FINALIZED, "encoding": encoding}
+            params = [addresses, options]
+            
+            result = await self._make_rpc_request("getMultipleAccounts", params)
+            return result.get("value", []) if result else []
+            
+        except Exception as e:
+            logger.error("Error getting multiple accounts", extra={
+                "accounts": len(addresses),
+                "error": str(e)
+            })
+            raise
+    
     # Token Holder and Concentration Methods
     
     async def get_token_largest_accounts(self, token_mint: str) -> List[Dict[str, Any]]:
@@ -221,27 +818,28 @@ class HeliusRPCClient:
             List of largest token accounts with balances (max 20)
         """
         try:
-            params = [token_mint, {"commitment": "finalized"}]
+            params = [token_mint, _FINALIZED]
             result = await self._make_rpc_request("getTokenLargestAccounts", params)
             
             accounts = result.get("value", []) if result else []
             
-            # Structure the largest accounts data
-            largest_accounts = []
-            for account in accounts:
-                ui_amount = account.get("uiAmount", 0)
-                if ui_amount and ui_amount > 0:
-                    largest_accounts.append({
-                        "address": account.get("address", ""),
-                        "balance": ui_amount,
-                        "amount": account.get("amount", "0"),
-                        "decimals": account.get("decimals", 9)
-                    })
+            # Structure the largest accounts data, skipping empty accounts
+            largest_accounts = [
+                {
+                    "address": account.get("address", ""),
+                    "balance": ui_amount,
+                    "amount": account.get("amount", "0"),
+                    "decimals": account.get("decimals", 9)
+                }
+                for account in accounts
+                if (ui_amount := account.get("uiAmount")) and ui_amount > 0
+            ]
             
-            logger.debug("Retrieved largest token accounts", extra={
-                "token_mint": token_mint,
-                "accounts_found": len(largest_accounts)
-            })
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Retrieved largest token accounts", extra={
+                    "token_mint": token_mint,
+                    "accounts_found": len(largest_accounts)
+                })
             
             return largest_accounts
             
@@ -269,7 +867,12 @@ class HeliusRPCClient:
         Get comprehensive token holder information combining multiple methods.
         
         Note: Limited to top 20 token accounts due to Helius API constraints.
-        This method gets the largest accounts and resolves their owner addresses.
+        This method gets the largest accounts and resolves their owner addresses,
+        costing two RPCs regardless of the number of holders.
+        
+        DAS getTokenAccounts returns owners inline but pages through accounts
+        in no particular balance order, so it cannot answer "largest holders"
+        without walking every page; it is deliberately not used here.
         
         Args:
             token_mint: Token mint address
@@ -289,64 +892,40 @@ class HeliusRPCClient:
                 })
                 return []
             
-            # Step 2: Get owner information for each token account
+            # Step 2: Resolve the owner of every token account in a single round-trip
             holders = []
             total_accounts = len(largest_accounts)
             effective_limit = min(limit, len(largest_accounts), 15)  # API max is 15
+            accounts = largest_accounts[:effective_limit]
             
-            # Process accounts in smaller batches to respect rate limits
-            batch_size = 5  # Smaller batches for better rate limit compliance
+            account_infos = await self.get_multiple_accounts([account["address"] for account in accounts])
             
-            for i in range(0, effective_limit, batch_size):
-                batch = largest_accounts[i:i+batch_size]
+            # Results are index-aligned with the requested addresses
+            for account, account_info in zip(accounts, account_infos):
+                if not account_info:
+                    continue
                 
-                # Add delay between batches for rate limiting
-                if i > 0:
-                    await asyncio.sleep(0.2)  # Increased delay for better rate limit compliance
-                
-                # Get account info for each token account to find the owner
-                for account in batch:
-                    try:
-                        account_address = account["address"]
-                        account_info = await self.get_account_info(account_address)
-                        
-                        if account_info:
-                            data = account_info.get("data", {})
-                            
-                            if isinstance(data, dict) and "parsed" in data:
-                                owner = data["parsed"]["info"].get("owner")
-                                if owner:
-                                    holders.append({
-                                        "address": owner,  # Wallet address of the holder
-                                        "token_account": account_address,  # Token account address
-                                        "balance": account["balance"],
-                                        "amount": account["amount"],
-                                        "decimals": account["decimals"],
-                                        "rank": len(holders) + 1
-                                    })
-                    
-                    except (RateLimitError, TokenNotFoundError) as e:
-                        logger.debug("Expected error processing account", extra={
-                            "account": account.get("address", ""),
-                            "error_type": type(e).__name__,
-                            "error": str(e)
-                        })
-                        # Continue processing other accounts
-                        continue
-                    except Exception as account_error:
-                        logger.debug("Unexpected error processing account", extra={
-                            "account": account.get("address", ""),
-                            "error": str(account_error)
+                data = account_info.get("data", {})
+                if isinstance(data, dict) and "parsed" in data:
+                    owner = data["parsed"].get("info", {}).get("owner")
+                    if owner:
+                        holders.append({
+                            "address": owner,  # Wallet address of the holder
+                            "token_account": account["address"],  # Token account address
+                            "balance": account["balance"],
+                            "amount": account["amount"],
+                            "decimals": account["decimals"],
+                            "rank": len(holders) + 1
                         })
-                        continue
             
-            logger.info("Token holders retrieved", extra={
-                "token_mint": token_mint,
-                "holders_found": len(holders),
-                "requested_limit": limit,
-                "api_constraint": "max_15_accounts",
-                "total_accounts": total_accounts
-            })
+            if logger.isEnabledFor(logging.INFO):
+                logger.info("Token holders retrieved", extra={
+                    "token_mint": token_mint,
+                    "holders_found": len(holders),
+                    "requested_limit": limit,
+                    "api_constraint": "max_15_accounts",
+                    "total_accounts": total_accounts
+                })
             
             return holders
             
@@ -409,17 +988,24 @@ class HeliusRPCClient:
             Dict with transaction details
         """
         try:
-            params = [
-                signature,
-                {
-                    "encoding": "jsonParsed",
-                    "commitment": "finalized",
-                    "maxSupportedTransactionVersion": max_supported_version
-                }
-            ]
+            # Requested at finalized commitment, so a found transaction is immutable
+            cache_key = f"helius:tx:{signature}:{max_supported_version}"
+            cached = await _persistent_get(cache_key)
+            if cached is not None:
+                return cached
+            
+            options = (
+                _TRANSACTION_PARAMS if max_supported_version == 0
+                else {**_TRANSACTION_PARAMS, "maxSupportedTransactionVersion": max_supported_version}
+            )
+            params = [signature, options]
             
             result = await self._make_rpc_request("getTransaction", params)
-            return result if result else {}
+            if not result:
+                return {}
+            
+            await _persistent_set(cache_key, result)
+            return result
             
         except Exception as e:
             logger.error("Error getting transaction", extra={
@@ -428,6 +1014,32 @@ class HeliusRPCClient:
             })
             raise
     
+    async def get_transactions_batched(
+        self,
+        signatures: List[str],
+        concurrency: Optional[int] = None,
+        max_supported_version: int = 0
+    ) -> List[Union[Dict[str, Any], BaseException]]:
+        """
+        Fetch many transactions concurrently with a bounded number in flight.
+        
+        Args:
+            signatures: Transaction signatures
+            concurrency: Maximum concurrent requests (defaults to settings.helius_max_concurrent)
+            max_supported_version: Maximum transaction version to support
+            
+        Returns:
+            Transaction details in signature order; a failed fetch leaves its
+            exception in place instead of failing the whole batch
+        """
+        semaphore = asyncio.Semaphore(concurrency or settings.helius_max_concurrent)
+        
+        async def fetch(signature: str) -> Dict[str, Any]:
+            async with semaphore:
+                return await self.get_transaction(signature, max_supported_version)
+        
+        return await asyncio.gather(*(fetch(signature) for signature in signatures), return_exceptions=True)
+    
     async def get_block(self, slot: int, encoding: str = "jsonParsed") -> Dict[str, Any]:
         """
         Get block information.
@@ -440,15 +1052,8 @@ class HeliusRPCClient:
             Dict with block information
         """
         try:
-            params = [
-                slot,
-                {
-                    "encoding": encoding,
-                    "commitment": "finalized",
-                    "transactionDetails": "signatures",
-                    "rewards": False
-                }
-            ]
+            options = _BLOCK_PARAMS if encoding == "jsonParsed" else {**_BLOCK_PARAMS, "encoding": encoding}
+            params = [slot, options]
             
             result = await self._make_rpc_request("getBlock", params)
             return result if result else {}
@@ -473,16 +1078,14 @@ class HeliusRPCClient:
             Price data from Jupiter or None if not found
         """
         try:
-            if not self.session:
-                raise SolanaRPCError("Client session not initialized")
+            session = type(self).get_session()
             
             jupiter_url = f"https://lite-api.jup.ag/price/v2?ids={token_mint}"
             
-            response = await self.session.get(jupiter_url)
+            response = await session.get(jupiter_url)
             response.raise_for_status()
             
-            price_data = response.json()
-            print(f'******************\nPrice data for {token_mint}\n{price_data}\n\n******************')
+            price_data = orjson.loads(response.content)
             
             if "data" in price_data and token_mint in price_data["data"]:
                 token_price = price_data["data"][token_mint]
@@ -506,16 +1109,19 @@ class HeliusRPCClient:
         """
         Get token metadata using Helius Digital Asset Standard (DAS) getAsset API.
         
+        Results are cached briefly per mint; lookups that find nothing are not.
+        
         Args:
             token_mint: Token mint address
             
         Returns:
             Token metadata including name, symbol, and other details
         """
+        return await _cached_load(_metadata_cache, token_mint, lambda: self._fetch_token_metadata_helius(token_mint))
+    
+    async def _fetch_token_metadata_helius(self, token_mint: str) -> Optional[Dict[str, Any]]:
+        """Fetch token metadata via DAS getAsset."""
         try:
-            if not self.session:
-                raise SolanaRPCError("Client session not initialized")
-            
             if not self.api_key:
                 logger.warning("No Helius API key provided for metadata fetch")
                 return None
@@ -527,74 +1133,17 @@ class HeliusRPCClient:
                 logger.info("No asset data returned", extra={"token_mint": token_mint})
                 return None
             
-            # Extract metadata from DAS response
-            content = result.get("content", {})
-            metadata = content.get("metadata", {})
-            token_info = result.get("token_info", {})
-            
-            # Get name and symbol from metadata
-            name = metadata.get("name", "").strip()
-            symbol = metadata.get("symbol", "").strip()
-            
-            # Clean up empty strings
-            name = name if name and name != "" else None
-            symbol = symbol if symbol and symbol != "" else None
-            
-            # Get token info
-            supply = token_info.get("supply", 0)
-            decimals = token_info.get("decimals", 9)
-            mint_authority = token_info.get("mint_authority")
-            freeze_authority = token_info.get("freeze_authority")
-            
-            # Get price info if available
-            price_info = token_info.get("price_info", {})
-            price_per_token = price_info.get("price_per_token")
-            price_currency = price_info.get("currency")
-            
-            # Additional metadata
-            description = metadata.get("description", "").strip()
-            description = description if description and description != "" else None
-            
-            # Get links and image
-            links = content.get("links", {})
-            image_url = links.get("image")
-            external_url = links.get("external_url")
-            
-            # Get collection info if available
-            grouping = result.get("grouping", [])
-            collection_address = None
-            for group in grouping:
-                if group.get("group_key") == "collection":
-                    collection_address = group.get("group_value")
-                    break
-            
-            logger.info("Successfully retrieved token metadata via DAS getAsset", extra={
-                "token_mint": token_mint,
-                "name": name,
-                "symbol": symbol,
-                "has_image": bool(image_url),
-                "has_collection": bool(collection_address)
-            })
+            metadata = _metadata_from_asset(token_mint, result)
             
-            return {
-                "address": token_mint,
-                "name": name,
-                "symbol": symbol,
-                "description": description,
-                "decimals": decimals,
-                "supply": supply,
-                "mint_authority": mint_authority,
-                "freeze_authority": freeze_authority,
-                "image_url": image_url,
-                "external_url": external_url,
-                "collection_address": collection_address,
-                "token_standard": metadata.get("token_standard"),
-                "is_mutable": result.get("mutable", False),
-                "is_burnt": result.get("burnt", False),
-                "price_per_token": price_per_token,
-                "price_currency": price_currency,
-                "metadata_source": "helius_das_getasset"
-            }
+            if logger.isEnabledFor(logging.INFO):
+                logger.info("Successfully retrieved token metadata via DAS getAsset", extra={
+                    "token_mint": token_mint,
+                    "name": metadata["name"],
+                    "symbol": metadata["symbol"],
+                    "has_image": bool(metadata["image_url"]),
+                    "has_collection": bool(metadata["collection_address"])
+                })
+            return metadata
             
         except TokenNotFoundError:
             logger.info("Token not found via DAS getAsset", extra={
@@ -628,11 +1177,12 @@ class HeliusRPCClient:
             metadata = await self.get_token_metadata_helius(token_mint)
             
             if metadata and (metadata.get("name") or metadata.get("symbol")):
-                logger.info("Got token metadata from Helius Enhanced API", extra={
-                    "token_mint": token_mint,
-                    "name": metadata.get("name"),
-                    "symbol": metadata.get("symbol")
-                })
+                if logger.isEnabledFor(logging.INFO):
+                    logger.info("Got token metadata from Helius Enhanced API", extra={
+                        "token_mint": token_mint,
+                        "name": metadata.get("name"),
+                        "symbol": metadata.get("symbol")
+                    })
                 return metadata
             return None
             
@@ -643,6 +1193,145 @@ class HeliusRPCClient:
             })
             return None
     
+    async def get_comprehensive_token_metadata_batch(self, token_mints: List[str]) -> Dict[str, Optional[Dict[str, Any]]]:
+        """
+        Get comprehensive metadata for many mints with batched getAsset calls.
+        
+        Uncached mints are fetched _METADATA_BATCH_SIZE per JSON-RPC batch, with
+        the batches sent concurrently. Shares the metadata cache with
+        get_token_metadata_helius.
+        
+        Args:
+            token_mints: Token mint addresses
+            
+        Returns:
+            Dict mapping each mint to the same metadata as
+            get_comprehensive_token_metadata, or None where it would return None
+        """
+        assets: Dict[str, Optional[Dict[str, Any]]] = {}
+        uncached = []
+        for token_mint in dict.fromkeys(token_mints):
+            cached = _metadata_cache.get(token_mint)
+            if cached is not None:
+                assets[token_mint] = cached
+            else:
+                uncached.append(token_mint)
+        
+        if uncached and not self.api_key:
+            logger.warning("No Helius API key provided for metadata fetch")
+            uncached = []
+        
+        chunks = [
+            uncached[i:i + _METADATA_BATCH_SIZE]
+            for i in range(0, len(uncached), _METADATA_BATCH_SIZE)
+        ]
+        results = await asyncio.gather(
+            *(
+                self._make_rpc_batch([("getAsset", {"id": token_mint}) for token_mint in chunk], return_exceptions=True)
+                for chunk in chunks
+            ),
+            return_exceptions=True
+        )
+        
+        for chunk, chunk_results in zip(chunks, results):
+            if isinstance(chunk_results, BaseException):
+                logger.warning("Error getting token metadata batch via DAS", extra={
+                    "token_count": len(chunk),
+                    "error": str(chunk_results)
+                })
+                chunk_results = [None] * len(chunk)
+            
+            for token_mint, result in zip(chunk, chunk_results):
+                if not result or isinstance(result, BaseException):
+                    assets[token_mint] = None
+                    continue
+                metadata = _metadata_from_asset(token_mint, result)
+                _metadata_cache.set(token_mint, metadata)
+                assets[token_mint] = metadata
+        
+        # Same rule as get_comprehensive_token_metadata: no name or symbol, no metadata
+        return {
+            token_mint: metadata if metadata and (metadata.get("name") or metadata.get("symbol")) else None
+            for token_mint, metadata in assets.items()
+        }
+    
+    async def get_full_token_snapshot(self, token_mint: str) -> Dict[str, Any]:
+        """
+        Fetch supply, DAS metadata and Jupiter price for a token concurrently.
+        
+        The three lookups are independent, so they are issued together over the
+        shared session instead of costing three sequential round-trips.
+        
+        Args:
+            token_mint: Token mint address
+            
+        Returns:
+            Dict with "supply", "metadata" and "price" entries; an entry is None
+            when its source had no data, was rate limited or failed
+        """
+        sources = ("supply", "metadata", "price")
+        results = await asyncio.gather(
+            self.get_token_supply(token_mint),
+            self.get_token_metadata_helius(token_mint),
+            self.get_token_price_jupiter(token_mint),
+            return_exceptions=True
+        )
+        
+        snapshot: Dict[str, Any] = {"token_mint": token_mint}
+        for source, result in zip(sources, results):
+            if isinstance(result, RateLimitError):
+                logger.warning("Rate limited fetching token snapshot source", extra={
+                    "token_mint": token_mint,
+                    "source": source
+                })
+                result = None
+            elif isinstance(result, TokenNotFoundError):
+                result = None
+            elif isinstance(result, Exception):
+                logger.error("Error fetching token snapshot source", extra={
+                    "token_mint": token_mint,
+                    "source": source,
+                    "error": str(result)
+                })
+                result = None
+            snapshot[source] = result
+        
+        return snapshot
+    
+    # Real-time Subscriptions
+    
+    async def subscribe_account(self, address: str) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Stream account updates pushed over the Solana WebSocket.
+        
+        Subscriptions are multiplexed over the process-wide WebSocket connection
+        held by the WebSocket manager rather than opening one per caller. Each
+        update also invalidates cached supply/metadata/balance for the address, so
+        mint changes are picked up without waiting for the TTL.
+        
+        Args:
+            address: Account (e.g. token mint) address to watch
+            
+        Yields:
+            The notification's result payload (context and account value)
+        """
+        from app.services.websocket_manager import solana_websocket_manager
+        
+        updates: asyncio.Queue = asyncio.Queue()
+        
+        async def on_update(subscription_id: int, result: Dict[str, Any]):
+            invalidate_token_caches(address)
+            _balance_cache.pop(address)
+            _invalid_account_cache.pop(address)
+            updates.put_nowait(result)
+        
+        request_id = await solana_websocket_manager.subscribe_account(address, on_update)
+        try:
+            while True:
+                yield await updates.get()
+        finally:
+            await solana_websocket_manager.unsubscribe(request_id)
+    
     # Analytics Calculations
     
     def calculate_market_cap(self, price: float, total_supply: float) -> float:
@@ -660,12 +1349,21 @@ class HeliusRPCClient:
         if not holders or total_supply <= 0:
             return {"top_10": 0.0, "top_50": 0.0, "top_100": 0.0}
         
-        # Sort holders by balance (descending)
-        sorted_holders = sorted(holders, key=lambda x: x.get("balance", 0), reverse=True)
+        # Only the 100 largest balances matter; nlargest avoids sorting every holder
+        top_balances = heapq.nlargest(100, (h.get("balance", 0) for h in holders))
         
-        top_10_balance = sum(h.get("balance", 0) for h in sorted_holders[:10])
-        top_50_balance = sum(h.get("balance", 0) for h in sorted_holders[:50])
-        top_100_balance = sum(h.get("balance", 0) for h in sorted_holders[:100])
+        # One running total, snapshotted at the top-10 and top-50 boundaries
+        top_10_balance = top_50_balance = top_100_balance = 0.0
+        for rank, balance in enumerate(top_balances, 1):
+            top_100_balance += balance
+            if rank == 10:
+                top_10_balance = top_100_balance
+            if rank == 50:
+                top_50_balance = top_100_balance
+        if len(top_balances) < 10:
+            top_10_balance = top_100_balance
+        if len(top_balances) < 50:
+            top_50_balance = top_100_balance
         
         return {
             "top_10": (top_10_balance / total_supply) * 100,
@@ -732,22 +1430,7 @@ class HeliusRPCClient:
             List of token accounts owned by the address
         """
         try:
-            filter_param = {"programId": program_id}
-            if token_mint:
-                filter_param = {"mint": token_mint}
-            
-            params = [
-                owner_address,
-                filter_param,
-                {
-                    "encoding": "jsonParsed",
-                    "commitment": "finalized"
-                }
-            ]
-            
-            result = await self._make_rpc_request("getTokenAccountsByOwner", params)
-            
-            accounts = result.get("value", []) if result else []
+            accounts = await self._fetch_token_accounts_by_owner(owner_address, token_mint, program_id)
             
             # Structure the token accounts data
             token_accounts = []
@@ -778,6 +1461,79 @@ class HeliusRPCClient:
             })
             raise
     
+    async def get_token_accounts_by_owner_soa(
+        self,
+        owner_address: str,
+        token_mint: Optional[str] = None,
+        program_id: str = "TokenkegQfeZyiNwAJbNbGKPFXCWuBvf9Ss623VQ5DA"
+    ) -> Dict[str, Any]:
+        """
+        Get token accounts owned by an address as columns instead of per-account dicts.
+        
+        Intended for large results that are only aggregated (sums, top-K):
+        numeric columns are packed typed arrays rather than one dict per account.
+        
+        Args:
+            owner_address: Owner's wallet address
+            token_mint: Optional specific token mint to filter by
+            program_id: Token program ID (defaults to SPL Token)
+            
+        Returns:
+            Dict of equal-length columns: "address" and "mint" (lists of str),
+            "balance" (array('d')), "amount" (array('Q')), "decimals" (array('B'))
+        """
+        try:
+            accounts = await self._fetch_token_accounts_by_owner(owner_address, token_mint, program_id)
+            
+            addresses: List[str] = []
+            mints: List[str] = []
+            balances = array('d')
+            amounts = array('Q')
+            decimals = array('B')
+            for account in accounts:
+                data = account.get("account", {}).get("data", {})
+                if isinstance(data, dict) and "parsed" in data:
+                    parsed_data = data["parsed"]["info"]
+                    token_amount = parsed_data.get("tokenAmount", {})
+                    
+                    addresses.append(account.get("pubkey", ""))
+                    mints.append(parsed_data.get("mint", ""))
+                    balances.append(float(token_amount.get("uiAmount") or 0))
+                    amounts.append(int(token_amount.get("amount", 0)))
+                    decimals.append(token_amount.get("decimals", 9))
+            
+            return {
+                "address": addresses,
+                "mint": mints,
+                "balance": balances,
+                "amount": amounts,
+                "decimals": decimals
+            }
+            
+        except Exception as e:
+            logger.error("Error getting token accounts by owner", extra={
+                "owner": owner_address,
+                "token_mint": token_mint,
+                "error": str(e)
+            })
+            raise
+    
+    async def _fetch_token_accounts_by_owner(
+        self,
+        owner_address: str,
+        token_mint: Optional[str],
+        program_id: str
+    ) -> List[Dict[str, Any]]:
+        """Fetch raw getTokenAccountsByOwner entries."""
+        filter_param = {"programId": program_id}
+        if token_mint:
+            filter_param = {"mint": token_mint}
+        
+        params = [owner_address, filter_param, _JSON_PARSED_FINALIZED]
+        
+        result = await self._make_rpc_request("getTokenAccountsByOwner", params)
+        return result.get("value", []) if result else []
+    
     async def get_token_account_balance(self, token_account: str) -> Dict[str, Any]:
         """
         Get balance of a specific token account.
@@ -788,17 +1544,20 @@ class HeliusRPCClient:
         Returns:
             Dict with token account balance information
         """
+        rejected = _invalid_account_cache.get(token_account)
+        if rejected is not None:
+            raise TokenNotFoundError(rejected)
+        
+        fetch = functools.partial(self._fetch_token_account_balance, token_account)
         try:
-            params = [token_account, {"commitment": "finalized"}]
-            result = await self._make_rpc_request("getTokenAccountBalance", params)
+            if _BALANCE_CACHE_ENABLED:
+                return await _cached_load(_balance_cache, token_account, fetch)
+            # Caching disabled: still share one in-flight request per account
+            return await _inflight_loads.run((_balance_cache.name, token_account), fetch)
             
-            value = result.get("value", {}) if result else {}
-            return {
-                "balance": float(value.get("uiAmount", 0)),
-                "amount": value.get("amount", "0"),
-                "decimals": value.get("decimals", 9),
-                "ui_amount_string": value.get("uiAmountString", "0")
-            }
+        except TokenNotFoundError as e:
+            _invalid_account_cache.set(token_account, str(e))
+            raise
             
         except Exception as e:
             logger.error("Error getting token account balance", extra={
@@ -806,6 +1565,67 @@ class HeliusRPCClient:
                 "error": str(e)
             })
             raise
+    
+    async def _fetch_token_account_balance(self, token_account: str) -> Dict[str, Any]:
+        """Fetch a token account balance from the RPC, bypassing the cache."""
+        result = await self._enqueue_balance(token_account)
+        return _balance_from_token_amount(result.get("value", {}) if result else {})
+    
+    async def get_token_account_balances(self, token_accounts: List[str]) -> Dict[str, Optional[Dict[str, Any]]]:
+        """
+        Get balances for many token accounts, 100 per getMultipleAccounts call.
+        
+        Shares the balance and rejected-account caches with
+        get_token_account_balance.
+        
+        Args:
+            token_accounts: Token account addresses
+            
+        Returns:
+            Dict mapping each address to the same balance dict as
+            get_token_account_balance, or None if it is not a token account
+        """
+        balances: Dict[str, Optional[Dict[str, Any]]] = {}
+        uncached = []
+        for account in dict.fromkeys(token_accounts):
+            if _invalid_account_cache.get(account) is not None:
+                balances[account] = None
+                continue
+            cached = _balance_cache.get(account) if _BALANCE_CACHE_ENABLED else None
+            if cached is not None:
+                balances[account] = cached
+            else:
+                uncached.append(account)
+        
+        chunks = [
+            uncached[i:i + _MULTIPLE_ACCOUNTS_LIMIT]
+            for i in range(0, len(uncached), _MULTIPLE_ACCOUNTS_LIMIT)
+        ]
+        results = await asyncio.gather(*(self.get_multiple_accounts(chunk) for chunk in chunks))
+        
+        for chunk, infos in zip(chunks, results):
+            for account, info in zip(chunk, infos):
+                data = info.get("data") if info else None
+                token_amount = (
+                    data.get("parsed", {}).get("info", {}).get("tokenAmount")
+                    if isinstance(data, dict) else None
+                )
+                if token_amount is None:
+                    _invalid_account_cache.set(account, f"Resource not found: {account} is not a token account")
+                    balances[account] = None
+                    continue
+                
+                balance = _balance_from_token_amount(token_amount)
+                if _BALANCE_CACHE_ENABLED:
+                    _balance_cache.set(account, balance)
+                balances[account] = balance
+        
+        return balances
+
+
+# Live references far beyond any real concurrency mean callers are not
+# releasing the client, which would keep it from ever closing
+_REFERENCE_LEAK_WARNING = 1000
 
 
 # Global client instance with proper lifecycle management
@@ -817,10 +1637,46 @@ class HeliusClientManager:
         self._session_active = False
         self._shutdown_requested = False
         self._reference_count = 0
+        self._max_observed_ref = 0
+        self._leak_warning_at = _REFERENCE_LEAK_WARNING
         self._lock = asyncio.Lock()
     
+    def get_client_nowait(self) -> Optional[HeliusRPCClient]:
+        """
+        Take a reference to the client without awaiting, if it is already started.
+        
+        Nothing awaits between the check and the increment, so this is atomic
+        on the event loop. Pair every non-None result with release_client().
+        
+        Returns:
+            The live client, or None if it still needs to be started (or is
+            shutting down); fall back to get_client() in that case
+        """
+        if self._session_active and self._client and not self._shutdown_requested:
+            self._add_reference()
+            return self._client
+        return None
+    
+    def _add_reference(self):
+        """Count a new client reference and warn if references look leaked."""
+        self._reference_count += 1
+        if self._reference_count > self._max_observed_ref:
+            self._max_observed_ref = self._reference_count
+            if self._reference_count >= self._leak_warning_at:
+                # Doubling keeps a genuine leak from flooding the log
+                self._leak_warning_at *= 2
+                logger.warning("Helius client references may be leaking", extra={
+                    "reference_count": self._reference_count,
+                    "next_warning_at": self._leak_warning_at
+                })
+    
     async def get_client(self) -> HeliusRPCClient:
         """Get or create the global client instance with reference counting."""
+        # Fast path: once the session is up, take a reference without the lock
+        client = self.get_client_nowait()
+        if client is not None:
+            return client
+        
         async with self._lock:
             if self._shutdown_requested:
                 raise SolanaRPCError("Client shutting down, no new requests accepted")
@@ -832,25 +1688,38 @@ class HeliusClientManager:
                 await self._client.__aenter__()
                 self._session_active = True
             
-            # Increment reference count
-            self._reference_count += 1
+            self._add_reference()
             
             return self._client
     
     async def release_client(self):
         """Release a reference to the client."""
+        if self._reference_count > 0:
+            self._reference_count -= 1
+        
+        # The lock is only needed for teardown once shutdown has been requested
+        if self._reference_count > 0 or not self._shutdown_requested:
+            return
+        
         async with self._lock:
-            if self._reference_count > 0:
-                self._reference_count -= 1
-            
             # Only close if no active references and shutdown was requested
-            if self._reference_count == 0 and self._shutdown_requested and self._session_active:
-                try:
-                    await self._client.__aexit__(None, None, None)
-                    self._session_active = False
-                    logger.info("HTTP client session closed after all references released")
-                except Exception as e:
-                    logger.warning(f"Error closing client session: {e}")
+            if self._reference_count == 0 and self._session_active:
+                await self._teardown("HTTP client session closed after all references released")
+    
+    async def _teardown(self, message: str):
+        """Close the session and drop the client so nothing keeps it alive."""
+        try:
+            await HeliusRPCClient.close_session()
+            self._session_active = False
+            logger.info(message)
+        except Exception as e:
+            logger.warning(f"Error closing client session: {e}")
+        
+        # Pending batch futures reference their tasks and the client; cancel
+        # them and drop the client so it is freed by refcounting, not the GC
+        if self._client is not None:
+            self._client._cancel_pending_balances()
+            self._client = None
     
     async def shutdown(self):
         """Request shutdown and close when no active references."""
@@ -860,12 +1729,7 @@ class HeliusClientManager:
             
             # If no active references, close immediately
             if self._reference_count == 0 and self._session_active:
-                try:
-                    await self._client.__aexit__(None, None, None)
-                    self._session_active = False
-                    logger.info("HTTP client session closed immediately")
-                except Exception as e:
-                    logger.warning(f"Error closing client session: {e}")
+                await self._teardown("HTTP client session closed immediately")
 
 # Global manager instance
 _helius_manager = HeliusClientManager()
@@ -887,9 +1751,22 @@ async def get_helius_client() -> HeliusContextManager:
     """Get a context-managed Helius client with proper reference counting."""
     return HeliusContextManager()
 
+@contextlib.asynccontextmanager
+async def helius_session_scope() -> AsyncIterator[HeliusRPCClient]:
+    """
+    Hold one client reference for a block that makes many RPC calls.
+    
+    Usage:
+        async with helius_session_scope() as client:
+            for account in accounts:
+                await client.get_token_account_balance(account)
+    """
+    client = _helius_manager.get_client_nowait() or await _helius_manager.get_client()
+    try:
+        yield client
+    finally:
+        await _helius_manager.release_client()
+
 async def shutdown_helius_client():
     """Shutdown the global Helius client manager."""
     await _helius_manager.shutdown()
-
-# Backwards compatibility - but this should be deprecated
-helius_client = HeliusRPCClient() 
\ No newline at end of file
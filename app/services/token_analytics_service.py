@@ -11,24 +11,169 @@ Uses the new HeliusRPCClient for data and SolanaWebSocketManager for real-time u
 """
 
 import asyncio
-import json
+import contextlib
+from bisect import bisect_left
+from collections import defaultdict
 from datetime import datetime, timezone, timedelta
-from typing import Dict, List, Optional, Any, Tuple
+from itertools import accumulate
+from operator import mul
+from types import MappingProxyType
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
 from decimal import Decimal
 
+import orjson
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import func, insert, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 
 from app.core.config import settings
 from app.core.logging import get_logger
 from app.core.database import get_async_db
+from app.core.singleflight import SingleFlight
+from app.core.ttl_cache import TTLCache
 from app.models.market_data import Token, TokenMetrics, TokenTransaction, TokenHolder
-from app.services.solana.helius_client import get_helius_client
+from app.services.solana.helius_client import (
+    HeliusRPCClient, get_helius_client, helius_session_scope
+)
 from app.services.websocket_manager import solana_websocket_manager
 from app.services.cache import cache
 
 logger = get_logger(__name__)
 
+# Leading byte of every cached metrics blob; bump it when the encoding changes so
+# entries written by older workers read as misses instead of failing to decode
+_METRICS_FORMAT_VERSION = b"\x01"
+
+
+def _dump_metrics(metrics: Dict[str, Any]) -> bytes:
+    """Encode metrics for the cache; Decimals and other non-JSON values become strings."""
+    return _METRICS_FORMAT_VERSION + orjson.dumps(metrics, default=str, option=orjson.OPT_NON_STR_KEYS)
+
+
+def _load_metrics(raw: Optional[bytes]) -> Optional[Dict[str, Any]]:
+    """Decode a cached metrics blob, or None if missing or in another format."""
+    if not raw or raw[:1] != _METRICS_FORMAT_VERSION:
+        return None
+    return orjson.loads(memoryview(raw)[1:])
+
+
+# Powers of ten for every decimals value an SPL mint uses in practice
+_POW10 = tuple(10 ** i for i in range(19))
+
+
+def _to_ui_amount(raw_amount: int, decimals: int) -> float:
+    """Convert a raw token amount to UI units."""
+    scale = _POW10[decimals] if 0 <= decimals < len(_POW10) else 10 ** decimals
+    return float(raw_amount) / scale
+
+
+def _median_from_sorted(balances: List[float]) -> float:
+    """Median of balances sorted in ascending order."""
+    n = len(balances)
+    if n == 0:
+        return 0.0
+    if n % 2 == 0:
+        return (balances[n//2 - 1] + balances[n//2]) / 2
+    return balances[n//2]
+
+
+def _gini_from_sorted(balances: List[float]) -> float:
+    """Gini coefficient of balances sorted in ascending order."""
+    n = len(balances)
+    total = sum(balances)
+    if n == 0 or total == 0:
+        return 0.0
+    # sum((2i - n - 1) * b_i) / (n * total) over ranks i = 1..n, as a single
+    # weighted sum evaluated in C via map
+    return sum(map(mul, range(1 - n, n, 2), balances)) / (n * total)
+
+
+def _token_upsert():
+    """INSERT into tokens that returns the existing row when the address is taken."""
+    stmt = pg_insert(Token)
+    # A no-op update on conflict makes RETURNING yield the existing row
+    return stmt.on_conflict_do_update(
+        index_elements=[Token.address],
+        set_={"address": stmt.excluded.address}
+    ).returning(Token)
+
+
+# Overall deadline for calculating the four metrics of one comprehensive request,
+# and the shorter wait for stragglers once some metric has already failed but
+# enough have succeeded
+_METRICS_DEADLINE_SECONDS = 60
+_METRICS_GRACE_SECONDS = 5
+
+# Share of metrics that must succeed for a response to be stored and cached
+_MIN_SUCCESS_RATE = 0.5
+
+# Metric rows are bulk-inserted every _METRIC_WRITE_INTERVAL seconds, or
+# immediately once this many are buffered
+_METRIC_WRITE_INTERVAL = 0.2
+_METRIC_WRITE_BATCH = 100
+
+# Per-metric cache TTLs in seconds, by how quickly each one goes stale. Market
+# cap follows the price; holder distribution and behaviour change slowly.
+_METRIC_CACHE_TTLS = {
+    "market_cap": 15,
+    "velocity": 60,
+    "concentration": 600,
+    "paperhand": 600,
+}
+_METRIC_NAMES = tuple(_METRIC_CACHE_TTLS)
+
+# Holder lists at least this long have their distribution statistics computed in
+# a worker thread; shorter ones are cheaper to finish than to hand off
+_CONCENTRATION_THREAD_THRESHOLD = 1000
+
+# Transactions fetched at once while sampling a token's recent activity
+_TRANSACTION_FETCH_CONCURRENCY = 10
+
+# Token rows by mint address. A token's identity never changes and its metadata
+# is refreshed at most hourly by update_token_metadata, which updates the entry
+_token_cache = TTLCache("token", ttl=3600, maxsize=50_000)
+
+# Category boundaries in ascending order; a value strictly above the i-th
+# threshold (and not above the next) gets label i + 1, so bisect_left selects it
+_VELOCITY_THRESHOLDS = (0.5, 1.0, 2.0, 5.0)
+_VELOCITY_LABELS = ("very_low", "low", "moderate", "high", "extremely_high")
+_CONCENTRATION_THRESHOLDS = (5, 15, 30, 50)
+_CONCENTRATION_LABELS = (
+    "well_distributed",
+    "somewhat_distributed",
+    "moderately_concentrated",
+    "highly_concentrated",
+    "extremely_concentrated",
+)
+_PAPERHAND_THRESHOLDS = (15, 30, 50, 70)
+_PAPERHAND_LABELS = ("diamond_hands", "strong_hands", "mixed_hands", "weak_hands", "extremely_weak_hands")
+
+# Placeholder metrics substituted when a calculation fails; the fallback methods
+# add last_updated
+_FALLBACK_MARKET_CAP = MappingProxyType({
+    "current_price_usd": 0.0,
+    "total_supply": 0,
+    "circulating_supply": 0,
+    "market_cap_usd": 0.0,
+    "error": "Data unavailable",
+})
+_FALLBACK_VELOCITY = MappingProxyType({
+    "volume_24h_usd": 0.0,
+    "velocity_ratio": 0.0,
+    "velocity_category": "unknown",
+    "error": "Data unavailable",
+})
+_FALLBACK_CONCENTRATION = MappingProxyType({
+    "concentration_ratios": None,  # Nested dict, built per call
+    "total_holders": 0,
+    "error": "Data unavailable",
+})
+_FALLBACK_PAPERHAND = MappingProxyType({
+    "paperhand_ratio_percent": 0.0,
+    "behavior_category": "unknown",
+    "error": "Data unavailable",
+})
+
 
 class TokenAnalyticsService:
     """
@@ -42,9 +187,17 @@ class TokenAnalyticsService:
     """
     
     def __init__(self):
-        self.cache_ttl = 300  # 5 minutes cache TTL for expensive calculations
+        # The combined response only coalesces bursts; each metric has its own TTL
+        self.cache_ttl = _METRIC_CACHE_TTLS["market_cap"]
         self.velocity_window = 24  # 24 hours for velocity calculations
         self.paperhand_threshold_hours = 24  # Transactions within 24h indicate paperhands
+        self._inflight = SingleFlight()
+        
+        # Metric rows waiting for the next bulk insert (see store_token_metrics)
+        self._metric_write_buffer: List[Dict[str, Any]] = []
+        self._metric_flush: Optional[asyncio.TimerHandle] = None
+        self._metric_flush_loop: Optional[asyncio.AbstractEventLoop] = None
+        self._metric_flush_tasks: set = set()
         
     async def get_comprehensive_metrics(self, token_mint: str) -> Dict[str, Any]:
         """
@@ -56,12 +209,23 @@ class TokenAnalyticsService:
         Returns:
             Dict containing market_cap, velocity, concentration, paperhand metrics
         """
-        cache_key = f"comprehensive_metrics:{token_mint}"
+        cache_key = f"comprehensive:{token_mint}"
         
         # Try cache first
-        cached_result = await cache.get(cache_key)
+        cached_result = _load_metrics(await cache.get_raw(cache_key))
         if cached_result:
-            return json.loads(cached_result)
+            return cached_result
+        
+        # Concurrent misses for the same token share one calculation
+        return await self._inflight.run(
+            cache_key, lambda: self._calculate_comprehensive_metrics(token_mint, cache_key)
+        )
+    
+    async def _calculate_comprehensive_metrics(self, token_mint: str, cache_key: str) -> Dict[str, Any]:
+        """Calculate, store and cache all four metrics after a cache miss."""
+        # One clock read for every timestamp in this response
+        now = datetime.now(timezone.utc)
+        now_iso = now.isoformat()
         
         try:
             # Validate token address format
@@ -71,35 +235,55 @@ class TokenAnalyticsService:
             # Get or create token in database with metadata
             token = await self.get_or_create_token(token_mint)
             
-            # Gather all metrics in parallel for efficiency with timeout
-            tasks = [
-                asyncio.wait_for(self.get_market_cap_metrics(token_mint), timeout=30),
-                asyncio.wait_for(self.get_velocity_metrics(token_mint), timeout=45),
-                asyncio.wait_for(self.get_concentration_metrics(token_mint), timeout=30),
-                asyncio.wait_for(self.get_paperhand_metrics(token_mint), timeout=60)
-            ]
-            
-            # Execute with error recovery
-            results = await asyncio.gather(*tasks, return_exceptions=True)
-            market_cap, velocity, concentration, paperhand = results
-            
-            # Handle partial failures gracefully
-            market_cap = market_cap if not isinstance(market_cap, Exception) else self._get_fallback_market_cap()
-            velocity = velocity if not isinstance(velocity, Exception) else self._get_fallback_velocity()
-            concentration = concentration if not isinstance(concentration, Exception) else self._get_fallback_concentration()
-            paperhand = paperhand if not isinstance(paperhand, Exception) else self._get_fallback_paperhand()
+            # Gather all metrics in parallel for efficiency with timeout. Velocity
+            # needs the market cap too, so it awaits the same task instead of
+            # fetching it a second time.
+            # All four metrics share one client reference for the whole fan-out
+            async with helius_session_scope() as client:
+                market_cap_task = asyncio.ensure_future(self._cached_metric(
+                    "market_cap", token_mint, lambda: self.get_market_cap_metrics(token_mint, client=client)
+                ))
+                tasks = [
+                    market_cap_task,
+                    asyncio.ensure_future(self._cached_metric("velocity", token_mint, lambda: self.get_velocity_metrics(
+                        token_mint, market_cap_task=market_cap_task, client=client
+                    ))),
+                    asyncio.ensure_future(self._cached_metric(
+                        "concentration", token_mint, lambda: self.get_concentration_metrics(token_mint, client=client)
+                    )),
+                    asyncio.ensure_future(self._cached_metric(
+                        "paperhand", token_mint, lambda: self.get_paperhand_metrics(token_mint, client=client)
+                    ))
+                ]
+                
+                # One deadline for the whole fan-out; metrics still running when it
+                # passes are cancelled and reported as timeouts
+                try:
+                    await self._wait_for_metrics(tasks)
+                finally:
+                    for task in tasks:
+                        task.cancel()
             
-            # Log any errors for monitoring
-            for i, (name, result) in enumerate([
-                ("market_cap", market_cap), ("velocity", velocity), 
-                ("concentration", concentration), ("paperhand", paperhand)
-            ]):
+            # Handle partial failures gracefully: log each failure and
+            # substitute its fallback in the same pass
+            fallbacks = (
+                self._get_fallback_market_cap, self._get_fallback_velocity,
+                self._get_fallback_concentration, self._get_fallback_paperhand
+            )
+            metrics = []
+            failures = 0
+            for name, task, fallback in zip(_METRIC_NAMES, tasks, fallbacks):
+                result = self._task_outcome(task)
                 if isinstance(result, Exception):
+                    failures += 1
                     logger.warning(f"Metric calculation failed: {name}", extra={
                         "token_mint": token_mint,
                         "error": str(result),
                         "metric": name
                     })
+                    result = fallback(now_iso)
+                metrics.append(result)
+            market_cap, velocity, concentration, paperhand = metrics
             
             # Combine all metrics with token information
             comprehensive_metrics = {
@@ -115,7 +299,7 @@ class TokenAnalyticsService:
                     "collection_address": getattr(token, 'collection_address', None) if token else None,
                     "token_standard": getattr(token, 'token_standard', None) if token else None
                 },
-                "timestamp": datetime.now(timezone.utc).isoformat(),
+                "timestamp": now_iso,
                 "market_cap": market_cap,
                 "velocity": velocity,
                 "concentration": concentration,
@@ -123,18 +307,20 @@ class TokenAnalyticsService:
                 "metadata": {
                     "data_freshness": "real-time",
                     "calculation_version": "v2.0",
-                    "next_update": (datetime.now(timezone.utc) + timedelta(minutes=5)).isoformat(),
-                    "partial_failure": any(isinstance(r, Exception) for r in results),
-                    "success_rate": sum(1 for r in results if not isinstance(r, Exception)) / len(results),
-                    "database_stored": False  # Will be updated if stored
+                    "next_update": (now + timedelta(seconds=self.cache_ttl)).isoformat(),
+                    "partial_failure": failures > 0,
+                    "success_rate": (len(tasks) - failures) / len(tasks),
+                    # Kept under its original name for API clients; True means the row
+                    # was queued for the next bulk insert, which runs after the response
+                    "database_stored": False  # Will be updated if queued
                 }
             }
             
             # Store metrics in database if we have a valid token
-            if token and comprehensive_metrics["metadata"]["success_rate"] >= 0.5:
+            if token and comprehensive_metrics["metadata"]["success_rate"] >= _MIN_SUCCESS_RATE:
                 try:
-                    stored = await self.store_token_metrics(str(token.id), comprehensive_metrics)
-                    comprehensive_metrics["metadata"]["database_stored"] = stored
+                    queued = await self.store_token_metrics(str(token.id), comprehensive_metrics)
+                    comprehensive_metrics["metadata"]["database_stored"] = queued
                 except Exception as store_error:
                     logger.warning("Failed to store metrics in database", extra={
                         "token_mint": token_mint,
@@ -142,8 +328,8 @@ class TokenAnalyticsService:
                     })
             
             # Cache successful results only
-            if comprehensive_metrics["metadata"]["success_rate"] >= 0.5:  # At least 50% success
-                await cache.set(cache_key, json.dumps(comprehensive_metrics, default=str), ttl=self.cache_ttl)
+            if comprehensive_metrics["metadata"]["success_rate"] >= _MIN_SUCCESS_RATE:
+                await cache.set_raw(cache_key, _dump_metrics(comprehensive_metrics), ttl=self.cache_ttl)
             
             return comprehensive_metrics
             
@@ -153,9 +339,8 @@ class TokenAnalyticsService:
                 "error": str(e)
             })
             # Return cached data if available, otherwise minimal response
-            cached_fallback = await cache.get(cache_key)
-            if cached_fallback:
-                cached_data = json.loads(cached_fallback)
+            cached_data = _load_metrics(await cache.get_raw(cache_key))
+            if cached_data:
                 cached_data["metadata"]["stale"] = True
                 return cached_data
             
@@ -168,65 +353,113 @@ class TokenAnalyticsService:
                     "decimals": 9,
                     "address": token_mint
                 },
-                "timestamp": datetime.now(timezone.utc).isoformat(),
+                "timestamp": now_iso,
                 "error": str(e),
-                "market_cap": self._get_fallback_market_cap(),
-                "velocity": self._get_fallback_velocity(),
-                "concentration": self._get_fallback_concentration(),
-                "paperhand": self._get_fallback_paperhand(),
+                "market_cap": self._get_fallback_market_cap(now_iso),
+                "velocity": self._get_fallback_velocity(now_iso),
+                "concentration": self._get_fallback_concentration(now_iso),
+                "paperhand": self._get_fallback_paperhand(now_iso),
                 "metadata": {
                     "error": True,
                     "message": "Unable to fetch complete metrics"
                 }
             }
     
+    @staticmethod
+    def _client_scope(client: Optional[HeliusRPCClient]):
+        """Use the caller's Helius client, or hold a reference of our own."""
+        if client is not None:
+            return contextlib.nullcontext(client)
+        return helius_session_scope()
+    
+    @staticmethod
+    async def _wait_for_metrics(tasks: List[asyncio.Future]):
+        """
+        Wait for metric tasks until all finish or the deadline passes.
+        
+        Once a metric has failed but enough have succeeded for a usable
+        response, the rest only get _METRICS_GRACE_SECONDS more: a failure
+        usually means upstream trouble that will stall them too.
+        """
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + _METRICS_DEADLINE_SECONDS
+        required = len(tasks) * _MIN_SUCCESS_RATE
+        pending = set(tasks)
+        
+        while pending:
+            done, pending = await asyncio.wait(
+                pending, timeout=max(deadline - loop.time(), 0), return_when=asyncio.FIRST_COMPLETED
+            )
+            if not done:
+                return  # Deadline passed
+            
+            finished = [task for task in tasks if task.done()]
+            failed = sum(1 for task in finished if task.cancelled() or task.exception() is not None)
+            if failed and len(finished) - failed >= required:
+                deadline = min(deadline, loop.time() + _METRICS_GRACE_SECONDS)
+    
+    @staticmethod
+    def _task_outcome(task: asyncio.Future) -> Any:
+        """Result of a finished metric task, or the exception it failed with."""
+        # Cancelled tasks are not marked done until the loop runs them again
+        if not task.done() or task.cancelled():
+            return asyncio.TimeoutError("Metric calculation exceeded the deadline")
+        return task.exception() or task.result()
+    
+    async def _cached_metric(
+        self,
+        metric: str,
+        token_mint: str,
+        compute: Callable[[], Awaitable[Dict[str, Any]]]
+    ) -> Dict[str, Any]:
+        """
+        Serve one metric from its own cache key, computing it on a miss.
+        
+        Args:
+            metric: Metric name; selects the TTL from _METRIC_CACHE_TTLS
+            token_mint: Token mint address
+            compute: Calculates the metric when it is not cached
+            
+        Returns:
+            The cached or freshly calculated metric
+        """
+        cache_key = f"{metric}:{token_mint}"
+        cached = _load_metrics(await cache.get_raw(cache_key))
+        if cached:
+            return cached
+        
+        result = await compute()
+        # Results flagged with an error are placeholders; recompute them next time
+        if result and "error" not in result:
+            await cache.set_raw(cache_key, _dump_metrics(result), ttl=_METRIC_CACHE_TTLS[metric])
+        return result
+    
     def _validate_token_address(self, token_address: str) -> bool:
         """Validate Solana token address format."""
-        if not token_address or len(token_address) < 32 or len(token_address) > 44:
-            return False
         # Additional validation could be added here
-        return True
+        return bool(token_address) and 32 <= len(token_address) <= 44
     
-    def _get_fallback_market_cap(self) -> Dict[str, Any]:
+    def _get_fallback_market_cap(self, now_iso: Optional[str] = None) -> Dict[str, Any]:
         """Return fallback market cap data."""
-        return {
-            "current_price_usd": 0.0,
-            "total_supply": 0,
-            "circulating_supply": 0,
-            "market_cap_usd": 0.0,
-            "error": "Data unavailable",
-            "last_updated": datetime.now(timezone.utc).isoformat()
-        }
+        return {**_FALLBACK_MARKET_CAP, "last_updated": now_iso or datetime.now(timezone.utc).isoformat()}
     
-    def _get_fallback_velocity(self) -> Dict[str, Any]:
+    def _get_fallback_velocity(self, now_iso: Optional[str] = None) -> Dict[str, Any]:
         """Return fallback velocity data."""
-        return {
-            "volume_24h_usd": 0.0,
-            "velocity_ratio": 0.0,
-            "velocity_category": "unknown",
-            "error": "Data unavailable",
-            "last_updated": datetime.now(timezone.utc).isoformat()
-        }
+        return {**_FALLBACK_VELOCITY, "last_updated": now_iso or datetime.now(timezone.utc).isoformat()}
     
-    def _get_fallback_concentration(self) -> Dict[str, Any]:
+    def _get_fallback_concentration(self, now_iso: Optional[str] = None) -> Dict[str, Any]:
         """Return fallback concentration data."""
         return {
+            **_FALLBACK_CONCENTRATION,
             "concentration_ratios": {"top_1": 0.0, "top_5": 0.0, "top_15": 0.0},
-            "total_holders": 0,
-            "error": "Data unavailable",
-            "last_updated": datetime.now(timezone.utc).isoformat()
+            "last_updated": now_iso or datetime.now(timezone.utc).isoformat()
         }
     
-    def _get_fallback_paperhand(self) -> Dict[str, Any]:
+    def _get_fallback_paperhand(self, now_iso: Optional[str] = None) -> Dict[str, Any]:
         """Return fallback paperhand data."""
-        return {
-            "paperhand_ratio_percent": 0.0,
-            "behavior_category": "unknown",
-            "error": "Data unavailable",
-            "last_updated": datetime.now(timezone.utc).isoformat()
-        }
+        return {**_FALLBACK_PAPERHAND, "last_updated": now_iso or datetime.now(timezone.utc).isoformat()}
     
-    async def get_market_cap_metrics(self, token_mint: str) -> Dict[str, Any]:
+    async def get_market_cap_metrics(self, token_mint: str, client: Optional[HeliusRPCClient] = None) -> Dict[str, Any]:
         """
         Calculate real-time market cap metrics.
         
@@ -234,12 +467,13 @@ class TokenAnalyticsService:
         
         Args:
             token_mint: Token mint address
+            client: Helius client held by the caller; acquired here if not given
             
         Returns:
             Dict with market cap, price, supply, and change data
         """
         try:
-            async with await get_helius_client() as client:
+            async with self._client_scope(client) as client:
                 # Get comprehensive metadata (includes supply, price, and currency)
                 metadata = await client.get_comprehensive_token_metadata(token_mint)
                 
@@ -254,7 +488,7 @@ class TokenAnalyticsService:
                 decimals = metadata.get("decimals", 9)
                 
                 # Convert raw supply to UI amount
-                ui_supply = float(raw_supply) / (10 ** decimals) if raw_supply > 0 else 0.0
+                ui_supply = _to_ui_amount(raw_supply, decimals) if raw_supply > 0 else 0.0
                 
                 # Calculate market cap
                 market_cap_usd = client.calculate_market_cap(price_per_token, ui_supply)
@@ -289,7 +523,12 @@ class TokenAnalyticsService:
             })
             raise
     
-    async def get_velocity_metrics(self, token_mint: str) -> Dict[str, Any]:
+    async def get_velocity_metrics(
+        self,
+        token_mint: str,
+        market_cap_task: Optional["asyncio.Future[Dict[str, Any]]"] = None,
+        client: Optional[HeliusRPCClient] = None
+    ) -> Dict[str, Any]:
         """
         Calculate token velocity metrics.
         
@@ -298,12 +537,15 @@ class TokenAnalyticsService:
         
         Args:
             token_mint: Token mint address
+            market_cap_task: Market cap metrics already being computed by the
+                caller; fetched here if not given
+            client: Helius client held by the caller; acquired here if not given
             
         Returns:
             Dict with velocity ratios and trading activity metrics
         """
         try:
-            async with await get_helius_client() as client:
+            async with self._client_scope(client) as client:
                 # Get recent transaction signatures
                 signatures = await client.get_signatures_for_address(
                     token_mint, 
@@ -311,7 +553,8 @@ class TokenAnalyticsService:
                 )
                 
                 # Filter to last 24 hours
-                cutoff_time = datetime.now(timezone.utc) - timedelta(hours=self.velocity_window)
+                now = datetime.now(timezone.utc)
+                cutoff_time = now - timedelta(hours=self.velocity_window)
                 recent_signatures = [
                     sig for sig in signatures 
                     if datetime.fromtimestamp(sig.get("blockTime", 0), timezone.utc) > cutoff_time
@@ -320,36 +563,41 @@ class TokenAnalyticsService:
                 # Analyze transactions for volume calculation
                 total_volume_24h = 0.0
                 transaction_count_24h = len(recent_signatures)
+                # An exact set is cheaper than a sketch here: at most 100 transactions are
+                # parsed, and the keys it holds are already referenced by those responses
                 unique_traders = set()
                 
-                # Process transactions in batches to avoid rate limits
-                batch_size = 10
-                for i in range(0, min(len(recent_signatures), 100), batch_size):  # Limit to 100 for performance
-                    batch = recent_signatures[i:i+batch_size]
-                    
-                    for sig_info in batch:
-                        try:
-                            signature = sig_info["signature"]
-                            transaction = await client.get_transaction(signature)
-                            
-                            # Extract volume and trader info from transaction
-                            volume, traders = self._extract_transaction_volume(transaction, token_mint)
-                            total_volume_24h += volume
-                            unique_traders.update(traders)
-                            
-                        except Exception as tx_error:
-                            logger.debug("Error processing transaction", extra={
-                                "signature": sig_info.get("signature", ""),
-                                "error": str(tx_error)
-                            })
-                            continue
-                    
-                    # Rate limiting
-                    if i + batch_size < min(len(recent_signatures), 100):
-                        await asyncio.sleep(0.1)
+                # Fetch the sample with at most _TRANSACTION_FETCH_CONCURRENCY requests in
+                # flight, starting the next as soon as one finishes; failures come back in place
+                sampled = recent_signatures[:100]  # Limit for performance
+                transactions = await client.get_transactions_batched(
+                    [sig_info["signature"] for sig_info in sampled],
+                    concurrency=_TRANSACTION_FETCH_CONCURRENCY
+                )
                 
-                # Get market cap for velocity calculation
-                market_cap_data = await self.get_market_cap_metrics(token_mint)
+                for sig_info, transaction in zip(sampled, transactions):
+                    try:
+                        if isinstance(transaction, BaseException):
+                            raise transaction
+                        
+                        # Extract volume and trader info from transaction
+                        volume, traders = self._extract_transaction_volume(transaction, token_mint)
+                        total_volume_24h += volume
+                        unique_traders.update(traders)
+                        
+                    except Exception as tx_error:
+                        logger.debug("Error processing transaction", extra={
+                            "signature": sig_info.get("signature", ""),
+                            "error": str(tx_error)
+                        })
+                        continue
+                
+                # Get market cap for velocity calculation; shield a shared task so a
+                # velocity timeout does not cancel it for the other consumer
+                if market_cap_task is not None:
+                    market_cap_data = await asyncio.shield(market_cap_task)
+                else:
+                    market_cap_data = await self.get_market_cap_metrics(token_mint, client=client)
                 market_cap_usd = market_cap_data["market_cap_usd"]
                 
                 # Calculate velocity
@@ -365,7 +613,7 @@ class TokenAnalyticsService:
                     "trading_frequency": transaction_count_24h / self.velocity_window,  # transactions per hour
                     "market_cap_usd": market_cap_usd,
                     "calculation_window_hours": self.velocity_window,
-                    "last_updated": datetime.now(timezone.utc).isoformat()
+                    "last_updated": now.isoformat()
                 }
                 
         except Exception as e:
@@ -375,7 +623,7 @@ class TokenAnalyticsService:
             })
             raise
     
-    async def get_concentration_metrics(self, token_mint: str) -> Dict[str, Any]:
+    async def get_concentration_metrics(self, token_mint: str, client: Optional[HeliusRPCClient] = None) -> Dict[str, Any]:
         """
         Calculate holder concentration ratios.
         
@@ -384,14 +632,22 @@ class TokenAnalyticsService:
         
         Args:
             token_mint: Token mint address
+            client: Helius client held by the caller; acquired here if not given
             
         Returns:
             Dict with concentration ratios and distribution metrics
         """
+        now_iso = datetime.now(timezone.utc).isoformat()
         try:
-            async with await get_helius_client() as client:
-                # Get comprehensive holder data
-                holders = await client.get_token_holders_comprehensive(token_mint, limit=20)
+            async with self._client_scope(client) as client:
+                # Holder data and total supply are independent; fetch them together
+                holders, supply_data = await asyncio.gather(
+                    client.get_token_holders_comprehensive(token_mint, limit=20),
+                    client.get_token_supply(token_mint),
+                    return_exceptions=True
+                )
+                if isinstance(holders, BaseException):
+                    raise holders
                 
                 if not holders:
                     return {
@@ -400,11 +656,12 @@ class TokenAnalyticsService:
                         "concentration_ratios": {"top_1": None, "top_5": None, "top_15": None},
                         "total_holders": 0,
                         "data_quality": "insufficient",
-                        "last_updated": datetime.now(timezone.utc).isoformat()
+                        "last_updated": now_iso
                     }
                 
-                # Get total supply for percentage calculations
-                supply_data = await client.get_token_supply(token_mint)
+                # Total supply for percentage calculations
+                if isinstance(supply_data, BaseException):
+                    raise supply_data
                 total_supply = supply_data["ui_amount"]
                 
                 if total_supply <= 0:
@@ -414,64 +671,21 @@ class TokenAnalyticsService:
                         "concentration_ratios": {"top_1": None, "top_5": None, "top_15": None},
                         "total_holders": len(holders) if holders else 0,
                         "data_quality": "insufficient",
-                        "last_updated": datetime.now(timezone.utc).isoformat()
+                        "last_updated": now_iso
                     }
                 
-                # Calculate concentration ratios with available data
-                # Note: Helius API typically returns max 15-20 largest accounts
-                available_accounts = min(len(holders), 20)
-                
-                # Calculate what we can with available data
-                top_1_balance = sum(h.get("balance", 0) for h in holders[:min(1, available_accounts)])
-                top_5_balance = sum(h.get("balance", 0) for h in holders[:min(5, available_accounts)])
-                top_15_balance = sum(h.get("balance", 0) for h in holders[:min(15, available_accounts)])
-                
-                # Calculate percentages
-                top_1_percent = (top_1_balance / total_supply) * 100 if total_supply > 0 else 0
-                top_5_percent = (top_5_balance / total_supply) * 100 if total_supply > 0 else 0
-                top_15_percent = (top_15_balance / total_supply) * 100 if total_supply > 0 else 0
-                
-                # These ratios align with our available data
-                concentration_ratios = {
-                    "top_1": round(top_1_percent, 2) if available_accounts >= 1 else None,
-                    "top_5": round(top_5_percent, 2) if available_accounts >= 5 else None,
-                    "top_15": round(top_15_percent, 2) if available_accounts >= 15 else None
-                }
-                
-                # Additional distribution analysis with available data
-                holder_count = len(holders)
-                median_balance = self._calculate_median_balance(holders)
-                gini_coefficient = self._calculate_gini_coefficient(holders) if len(holders) >= 5 else None
-                
-                # Categorize top holders
-                whale_threshold = total_supply * 0.01  # 1% of supply
-                whales = [h for h in holders if h["balance"] >= whale_threshold]
-                
-                # Determine data quality based on available accounts
-                data_quality = "excellent" if available_accounts >= 15 else "good" if available_accounts >= 10 else "limited"
+                # Distribution statistics are pure CPU work; keep large holder lists
+                # off the event loop
+                if len(holders) >= _CONCENTRATION_THREAD_THRESHOLD:
+                    stats = await asyncio.to_thread(self._concentration_stats, holders, total_supply)
+                else:
+                    stats = self._concentration_stats(holders, total_supply)
                 
                 return {
-                    "total_holders": holder_count,
-                    "available_top_accounts": available_accounts,
-                    "concentration_ratios": concentration_ratios,
-                    "whale_count": len(whales),
-                    "whale_threshold_percent": 1.0,
-                    "median_balance": round(median_balance, 4) if median_balance > 0 else 0,
-                    "gini_coefficient": round(gini_coefficient, 3) if gini_coefficient is not None else None,
-                    "distribution_category": self._categorize_concentration(concentration_ratios["top_1"] or 0),
-                    "top_holders": [
-                        {
-                            "rank": h["rank"],
-                            "address": h["address"],
-                            "balance": round(h["balance"], 4),
-                            "percentage": round((h["balance"] / total_supply) * 100, 3)
-                        }
-                        for h in holders[:min(10, available_accounts)]  # Show available top holders
-                    ],
+                    **stats,
                     "total_supply": round(total_supply, 2),
-                    "data_quality": data_quality,
                     "api_limitation_note": "Refactored to show top_1, top_5, top_15 based on available data from Helius API.",
-                    "last_updated": datetime.now(timezone.utc).isoformat()
+                    "last_updated": now_iso
                 }
                 
         except Exception as e:
@@ -481,7 +695,64 @@ class TokenAnalyticsService:
             })
             raise
     
-    async def get_paperhand_metrics(self, token_mint: str) -> Dict[str, Any]:
+    async def get_stored_holder_distribution(self, token_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Aggregate holder balances stored in token_holders with a single query.
+        
+        Top-k sums, holder count, median and Gini are computed by PostgreSQL
+        over the (token_id, balance) index, so no holder rows are loaded.
+        
+        Args:
+            token_id: Token UUID
+            
+        Returns:
+            Dict with holder_count, total_balance, top_1/top_5/top_15 balance
+            sums, median_balance and gini_coefficient, or None if no holders
+            are stored for the token
+        """
+        # Rank 1 is the largest holder; with descending ranks r the Gini
+        # coefficient is sum((n + 1 - 2r) * balance) / (n * total)
+        ranked = select(
+            TokenHolder.balance.label("balance"),
+            func.row_number().over(order_by=TokenHolder.balance.desc()).label("rank"),
+            func.count().over().label("n")
+        ).where(
+            TokenHolder.token_id == token_id,
+            TokenHolder.is_active.is_(True)
+        ).subquery()
+        
+        total = func.sum(ranked.c.balance)
+        stmt = select(
+            func.count().label("holder_count"),
+            total.label("total_balance"),
+            func.sum(ranked.c.balance).filter(ranked.c.rank <= 1).label("top_1"),
+            func.sum(ranked.c.balance).filter(ranked.c.rank <= 5).label("top_5"),
+            func.sum(ranked.c.balance).filter(ranked.c.rank <= 15).label("top_15"),
+            func.percentile_cont(0.5).within_group(ranked.c.balance).label("median_balance"),
+            (
+                func.sum((ranked.c.n + 1 - 2 * ranked.c.rank) * ranked.c.balance)
+                / func.nullif(func.max(ranked.c.n) * total, 0)
+            ).label("gini_coefficient")
+        )
+        
+        try:
+            async for db_session in get_async_db():
+                row = (await db_session.execute(stmt)).one()
+                if not row.holder_count:
+                    return None
+                return {
+                    key: float(value) if value is not None and key != "holder_count" else value
+                    for key, value in row._mapping.items()
+                }
+                
+        except Exception as e:
+            logger.error("Error aggregating stored holder balances", extra={
+                "token_id": token_id,
+                "error": str(e)
+            })
+            raise
+    
+    async def get_paperhand_metrics(self, token_mint: str, client: Optional[HeliusRPCClient] = None) -> Dict[str, Any]:
         """
         Calculate paperhand vs diamond hand behavior analysis.
         
@@ -490,12 +761,15 @@ class TokenAnalyticsService:
         
         Args:
             token_mint: Token mint address
+            client: Helius client held by the caller; acquired here if not given
             
         Returns:
             Dict with paperhand ratio and holder behavior analysis
         """
+        now = datetime.now(timezone.utc)
+        now_iso = now.isoformat()
         try:
-            async with await get_helius_client() as client:
+            async with self._client_scope(client) as client:
                 # Get recent transaction data for behavioral analysis
                 signatures = await client.get_signatures_for_address(
                     token_mint,
@@ -510,11 +784,11 @@ class TokenAnalyticsService:
                         "behavior_category": "insufficient_data",
                         "data_quality": "insufficient",
                         "analysis_note": "No recent transactions found for behavioral analysis",
-                        "last_updated": datetime.now(timezone.utc).isoformat()
+                        "last_updated": now_iso
                     }
                 
                 # Analyze transaction patterns
-                cutoff_time = datetime.now(timezone.utc) - timedelta(hours=self.paperhand_threshold_hours)
+                cutoff_time = now - timedelta(hours=self.paperhand_threshold_hours)
                 
                 quick_sellers = set()
                 long_holders = set()
@@ -522,52 +796,50 @@ class TokenAnalyticsService:
                 total_volume_diamond = 0.0
                 
                 # Track buying and selling patterns
-                trader_actions = {}  # address -> list of actions
+                trader_actions: Dict[str, List[Dict[str, Any]]] = defaultdict(list)  # address -> list of actions
                 
                 # Process transactions to identify behavior patterns
-                batch_size = 10
                 processed_count = 0
                 
-                for i in range(0, min(len(signatures), 200), batch_size):  # Limit for performance
-                    batch = signatures[i:i+batch_size]
-                    
-                    for sig_info in batch:
-                        try:
-                            signature = sig_info["signature"]
-                            block_time = datetime.fromtimestamp(sig_info.get("blockTime", 0), timezone.utc)
-                            
-                            transaction = await client.get_transaction(signature)
-                            
-                            # Analyze transaction for buy/sell patterns
-                            actions = self._analyze_transaction_behavior(transaction, token_mint, block_time)
-                            
-                            for action in actions:
-                                trader = action["trader"]
-                                action_type = action["type"]  # "buy" or "sell"
-                                amount = action["amount"]
-                                
-                                if trader not in trader_actions:
-                                    trader_actions[trader] = []
-                                
-                                trader_actions[trader].append({
-                                    "type": action_type,
-                                    "amount": amount,
-                                    "timestamp": block_time,
-                                    "signature": signature
-                                })
-                            
-                            processed_count += 1
+                # Fetch the sample with at most _TRANSACTION_FETCH_CONCURRENCY requests in
+                # flight, starting the next as soon as one finishes; failures come back in place
+                sampled = signatures[:200]  # Limit for performance
+                transactions = await client.get_transactions_batched(
+                    [sig_info["signature"] for sig_info in sampled],
+                    concurrency=_TRANSACTION_FETCH_CONCURRENCY
+                )
+                
+                for sig_info, transaction in zip(sampled, transactions):
+                    try:
+                        if isinstance(transaction, BaseException):
+                            raise transaction
+                        
+                        signature = sig_info["signature"]
+                        block_time = datetime.fromtimestamp(sig_info.get("blockTime", 0), timezone.utc)
+                        
+                        # Analyze transaction for buy/sell patterns
+                        actions = self._analyze_transaction_behavior(transaction, token_mint, block_time)
+                        
+                        for action in actions:
+                            trader = action["trader"]
+                            action_type = action["type"]  # "buy" or "sell"
+                            amount = action["amount"]
                             
-                        except Exception as tx_error:
-                            logger.debug("Error processing transaction for paperhand analysis", extra={
-                                "signature": sig_info.get("signature", ""),
-                                "error": str(tx_error)
+                            trader_actions[trader].append({
+                                "type": action_type,
+                                "amount": amount,
+                                "timestamp": block_time,
+                                "signature": signature
                             })
-                            continue
-                    
-                    # Rate limiting
-                    if i + batch_size < min(len(signatures), 200):
-                        await asyncio.sleep(0.1)
+                        
+                        processed_count += 1
+                        
+                    except Exception as tx_error:
+                        logger.debug("Error processing transaction for paperhand analysis", extra={
+                            "signature": sig_info.get("signature", ""),
+                            "error": str(tx_error)
+                        })
+                        continue
                 
                 # Check if we have sufficient data for analysis
                 if processed_count < 5:
@@ -579,12 +851,12 @@ class TokenAnalyticsService:
                         "data_quality": "insufficient",
                         "transactions_analyzed": processed_count,
                         "analysis_note": f"Only {processed_count} transactions processed. Minimum 5 required for reliable analysis.",
-                        "last_updated": datetime.now(timezone.utc).isoformat()
+                        "last_updated": now_iso
                     }
                 
                 # Analyze trader behavior patterns
                 for trader, actions in trader_actions.items():
-                    behavior = self._classify_trader_behavior(actions, cutoff_time)
+                    behavior = self._classify_trader_behavior(actions, cutoff_time, now)
                     
                     if behavior["type"] == "paperhand":
                         quick_sellers.add(trader)
@@ -606,7 +878,7 @@ class TokenAnalyticsService:
                         "behavior_category": "insufficient_data",
                         "data_quality": "insufficient",
                         "analysis_note": "No clear trading patterns detected in recent transactions",
-                        "last_updated": datetime.now(timezone.utc).isoformat()
+                        "last_updated": now_iso
                     }
                 
                 paperhand_ratio = (paperhand_count / total_traders) * 100
@@ -630,7 +902,7 @@ class TokenAnalyticsService:
                     "data_quality": data_quality,
                     "transactions_analyzed": processed_count,
                     "analysis_note": f"Analysis based on {processed_count} recent transactions with {confidence_score:.1%} confidence",
-                    "last_updated": datetime.now(timezone.utc).isoformat()
+                    "last_updated": now_iso
                 }
                 
         except Exception as e:
@@ -659,13 +931,15 @@ class TokenAnalyticsService:
             account_keys = transaction.get("transaction", {}).get("message", {}).get("accountKeys", [])
             
             # Simplified volume calculation - this would need more sophisticated parsing
-            # For now, estimate based on balance changes
-            for i, (pre, post) in enumerate(zip(pre_balances, post_balances)):
-                if i < len(account_keys):
-                    balance_change = abs(post - pre) / 10**9  # Convert lamports to SOL
-                    if balance_change > 0:
-                        volume += balance_change * 0.1  # Rough estimate
-                        traders.append(account_keys[i])
+            # For now, estimate based on balance changes. zip stops at the shortest
+            # list, so balances without an account key are skipped as before; the
+            # lamport total stays an int and is converted once
+            lamports_moved = 0
+            for account_key, pre, post in zip(account_keys, pre_balances, post_balances):
+                if pre != post:
+                    lamports_moved += abs(post - pre)
+                    traders.append(account_key)
+            volume = lamports_moved / 10**9 * 0.1  # Convert lamports to SOL; rough estimate
             
         except Exception as e:
             logger.debug("Error extracting transaction volume", extra={"error": str(e)})
@@ -688,27 +962,31 @@ class TokenAnalyticsService:
             pre_balances = meta.get("preBalances", [])
             post_balances = meta.get("postBalances", [])
             
-            for i, (pre, post) in enumerate(zip(pre_balances, post_balances)):
-                if i < len(account_keys):
-                    balance_change = post - pre
+            for account_key, pre, post in zip(account_keys, pre_balances, post_balances):
+                balance_change = post - pre
+                
+                if abs(balance_change) > 1000000:  # Minimum threshold (0.001 SOL)
+                    action_type = "buy" if balance_change > 0 else "sell"
+                    amount = abs(balance_change) / 10**9  # Convert to SOL
                     
-                    if abs(balance_change) > 1000000:  # Minimum threshold (0.001 SOL)
-                        action_type = "buy" if balance_change > 0 else "sell"
-                        amount = abs(balance_change) / 10**9  # Convert to SOL
-                        
-                        actions.append({
-                            "trader": account_keys[i],
-                            "type": action_type,
-                            "amount": amount,
-                            "timestamp": block_time
-                        })
+                    actions.append({
+                        "trader": account_key,
+                        "type": action_type,
+                        "amount": amount,
+                        "timestamp": block_time
+                    })
         
         except Exception as e:
             logger.debug("Error analyzing transaction behavior", extra={"error": str(e)})
         
         return actions
     
-    def _classify_trader_behavior(self, actions: List[Dict[str, Any]], cutoff_time: datetime) -> Dict[str, Any]:
+    def _classify_trader_behavior(
+        self,
+        actions: List[Dict[str, Any]],
+        cutoff_time: datetime,
+        now: Optional[datetime] = None
+    ) -> Dict[str, Any]:
         """Classify a trader's behavior as paperhand or diamond hand."""
         if not actions:
             return {"type": "unknown", "volume": 0.0}
@@ -719,22 +997,24 @@ class TokenAnalyticsService:
         # Look for quick buy-sell patterns (paperhands)
         total_volume = sum(action["amount"] for action in actions)
         
-        for i, action in enumerate(sorted_actions):
+        # Each buy is matched with the first sell after it. The buys matched with a
+        # given sell are those since the previous sell, and the latest of them is
+        # the closest, so one pass tracking the latest unmatched buy suffices
+        threshold = timedelta(hours=self.paperhand_threshold_hours)
+        last_buy_time = None
+        for action in sorted_actions:
             if action["type"] == "buy":
-                # Look for a sell within the threshold period
-                for j in range(i+1, len(sorted_actions)):
-                    next_action = sorted_actions[j]
-                    if next_action["type"] == "sell":
-                        time_diff = next_action["timestamp"] - action["timestamp"]
-                        if time_diff <= timedelta(hours=self.paperhand_threshold_hours):
-                            return {"type": "paperhand", "volume": total_volume}
-                        break
+                last_buy_time = action["timestamp"]
+            elif action["type"] == "sell" and last_buy_time is not None:
+                if action["timestamp"] - last_buy_time <= threshold:
+                    return {"type": "paperhand", "volume": total_volume}
+                last_buy_time = None
         
         # If no quick sell pattern found, consider diamond hands
         # Also consider if they've been holding for a long time
         if sorted_actions:
             first_action = sorted_actions[0]
-            time_since_first = datetime.now(timezone.utc) - first_action["timestamp"]
+            time_since_first = (now or datetime.now(timezone.utc)) - first_action["timestamp"]
             
             if time_since_first > timedelta(days=7):  # Held for more than a week
                 return {"type": "diamond", "volume": total_volume}
@@ -747,76 +1027,102 @@ class TokenAnalyticsService:
             return 0.0
         return ((current - previous) / previous) * 100
     
+    def _concentration_stats(self, holders: List[Dict[str, Any]], total_supply: float) -> Dict[str, Any]:
+        """
+        Compute concentration ratios and distribution statistics for ranked holders.
+        
+        Pure function of its arguments so it can run in a worker thread.
+        
+        Args:
+            holders: Holders ranked by balance, largest first
+            total_supply: Positive total token supply in UI units
+            
+        Returns:
+            Dict with the concentration, whale, median, Gini and top holder
+            fields of the concentration metrics
+        """
+        # Calculate concentration ratios with available data
+        # Note: Helius API typically returns max 15-20 largest accounts
+        available_accounts = min(len(holders), 20)
+        
+        # Calculate what we can with available data; one running total
+        # over the ranked holders gives every top-k sum
+        cumulative = list(accumulate(h.get("balance", 0) for h in holders[:available_accounts]))
+        top_1_balance = cumulative[0]
+        top_5_balance = cumulative[min(5, available_accounts) - 1]
+        top_15_balance = cumulative[min(15, available_accounts) - 1]
+        
+        # Calculate percentages
+        top_1_percent = (top_1_balance / total_supply) * 100
+        top_5_percent = (top_5_balance / total_supply) * 100
+        top_15_percent = (top_15_balance / total_supply) * 100
+        
+        # These ratios align with our available data
+        concentration_ratios = {
+            "top_1": round(top_1_percent, 2) if available_accounts >= 1 else None,
+            "top_5": round(top_5_percent, 2) if available_accounts >= 5 else None,
+            "top_15": round(top_15_percent, 2) if available_accounts >= 15 else None
+        }
+        
+        # Additional distribution analysis with available data; median, Gini and
+        # the whale count all read the same sorted balances
+        balances = sorted([h["balance"] for h in holders])
+        median_balance = _median_from_sorted(balances)
+        gini_coefficient = _gini_from_sorted(balances) if len(balances) >= 5 else None
+        
+        # Categorize top holders
+        whale_threshold = total_supply * 0.01  # 1% of supply
+        whale_count = len(balances) - bisect_left(balances, whale_threshold)
+        
+        # Determine data quality based on available accounts
+        data_quality = "excellent" if available_accounts >= 15 else "good" if available_accounts >= 10 else "limited"
+        
+        return {
+            "total_holders": len(holders),
+            "available_top_accounts": available_accounts,
+            "concentration_ratios": concentration_ratios,
+            "whale_count": whale_count,
+            "whale_threshold_percent": 1.0,
+            "median_balance": round(median_balance, 4) if median_balance > 0 else 0,
+            "gini_coefficient": round(gini_coefficient, 3) if gini_coefficient is not None else None,
+            "distribution_category": self._categorize_concentration(concentration_ratios["top_1"] or 0),
+            "top_holders": [
+                {
+                    "rank": h["rank"],
+                    "address": h["address"],
+                    "balance": round(h["balance"], 4),
+                    "percentage": round((h["balance"] / total_supply) * 100, 3)
+                }
+                for h in holders[:min(10, available_accounts)]  # Show available top holders
+            ],
+            "data_quality": data_quality
+        }
+    
     def _calculate_median_balance(self, holders: List[Dict[str, Any]]) -> float:
         """Calculate median balance among holders."""
         if not holders:
             return 0.0
         
-        balances = sorted([h["balance"] for h in holders])
-        n = len(balances)
-        
-        if n % 2 == 0:
-            return (balances[n//2 - 1] + balances[n//2]) / 2
-        else:
-            return balances[n//2]
+        return _median_from_sorted(sorted([h["balance"] for h in holders]))
     
     def _calculate_gini_coefficient(self, holders: List[Dict[str, Any]]) -> float:
         """Calculate Gini coefficient for wealth distribution."""
         if not holders:
             return 0.0
         
-        balances = sorted([h["balance"] for h in holders])
-        n = len(balances)
-        
-        if n == 0:
-            return 0.0
-        
-        cumsum = sum(balances)
-        if cumsum == 0:
-            return 0.0
-        
-        # Gini coefficient calculation
-        index = list(range(1, n + 1))
-        return (2 * sum(index[i] * balances[i] for i in range(n))) / (n * cumsum) - (n + 1) / n
+        return _gini_from_sorted(sorted([h["balance"] for h in holders]))
     
     def _categorize_velocity(self, velocity_ratio: float) -> str:
         """Categorize velocity ratio into descriptive categories."""
-        if velocity_ratio > 5.0:
-            return "extremely_high"
-        elif velocity_ratio > 2.0:
-            return "high"
-        elif velocity_ratio > 1.0:
-            return "moderate"
-        elif velocity_ratio > 0.5:
-            return "low"
-        else:
-            return "very_low"
+        return _VELOCITY_LABELS[bisect_left(_VELOCITY_THRESHOLDS, velocity_ratio)]
     
     def _categorize_concentration(self, top_1_percent: float) -> str:
         """Categorize concentration ratio into descriptive categories based on top holder."""
-        if top_1_percent > 50:
-            return "extremely_concentrated"
-        elif top_1_percent > 30:
-            return "highly_concentrated"
-        elif top_1_percent > 15:
-            return "moderately_concentrated"
-        elif top_1_percent > 5:
-            return "somewhat_distributed"
-        else:
-            return "well_distributed"
+        return _CONCENTRATION_LABELS[bisect_left(_CONCENTRATION_THRESHOLDS, top_1_percent)]
     
     def _categorize_paperhand_ratio(self, paperhand_percent: float) -> str:
         """Categorize paperhand ratio into descriptive categories."""
-        if paperhand_percent > 70:
-            return "extremely_weak_hands"
-        elif paperhand_percent > 50:
-            return "weak_hands"
-        elif paperhand_percent > 30:
-            return "mixed_hands"
-        elif paperhand_percent > 15:
-            return "strong_hands"
-        else:
-            return "diamond_hands"
+        return _PAPERHAND_LABELS[bisect_left(_PAPERHAND_THRESHOLDS, paperhand_percent)]
     
     async def _get_historical_market_cap(self, token_mint: str) -> Dict[str, Any]:
         """Get historical market cap data for comparison."""
@@ -880,6 +1186,10 @@ class TokenAnalyticsService:
         Returns:
             Token model instance
         """
+        token = _token_cache.get(token_mint)
+        if token is not None:
+            return token
+        
         try:
             async for db_session in get_async_db():
                 try:
@@ -894,6 +1204,7 @@ class TokenAnalyticsService:
                             "name": token.name,
                             "symbol": token.symbol
                         })
+                        _token_cache.set(token_mint, token)
                         return token
                     
                     # Token doesn't exist, fetch metadata and create
@@ -916,35 +1227,17 @@ class TokenAnalyticsService:
                                 "decimals": 9
                             }
                     
-                    # Create new token record
-                    # Convert raw supply to UI amount to prevent database overflow
-                    raw_supply = metadata.get("supply")
-                    decimals = metadata.get("decimals", 9)
-                    ui_supply = None
-                    if raw_supply is not None and raw_supply > 0:
-                        ui_supply = float(raw_supply) / (10 ** decimals)
-                    
-                    new_token = Token(
-                        address=token_mint,
-                        name=metadata.get("name"),
-                        symbol=metadata.get("symbol"),
-                        decimals=decimals,
-                        total_supply=ui_supply,
-                        creator=metadata.get("mint_authority"),
-                        is_active=True,
-                        currency=metadata.get("price_currency"),
-                        description=metadata.get("description"),
-                        image_url=metadata.get("image_url"),
-                        external_url=metadata.get("external_url"),
-                        collection_address=metadata.get("collection_address"),
-                        token_standard=metadata.get("token_standard"),
-                        is_mutable=metadata.get("is_mutable"),
-                        is_burnt=metadata.get("is_burnt")
+                    # Create new token record; upsert so the insert and the generated
+                    # columns come back in one round trip, and a token created
+                    # concurrently by another request is returned instead of failing
+                    # on the unique address
+                    result = await db_session.execute(
+                        _token_upsert().values(**self._token_row(token_mint, metadata)),
+                        execution_options={"populate_existing": True}
                     )
-                    
-                    db_session.add(new_token)
+                    new_token = result.scalar_one()
                     await db_session.commit()
-                    await db_session.refresh(new_token)
+                    _token_cache.set(token_mint, new_token)
                     
                     logger.info("Created new token in database", extra={
                         "token_mint": token_mint,
@@ -972,6 +1265,114 @@ class TokenAnalyticsService:
             })
             return None
     
+    def _token_row(self, token_mint: str, metadata: Dict[str, Any]) -> Dict[str, Any]:
+        """Build the tokens row for a new mint from its metadata."""
+        # Convert raw supply to UI amount to prevent database overflow
+        raw_supply = metadata.get("supply")
+        decimals = metadata.get("decimals", 9)
+        ui_supply = None
+        if raw_supply is not None and raw_supply > 0:
+            ui_supply = _to_ui_amount(raw_supply, decimals)
+        
+        return {
+            "address": token_mint,
+            "name": metadata.get("name"),
+            "symbol": metadata.get("symbol"),
+            "decimals": decimals,
+            "total_supply": ui_supply,
+            "creator": metadata.get("mint_authority"),
+            "is_active": True,
+            "currency": metadata.get("price_currency"),
+            "description": metadata.get("description"),
+            "image_url": metadata.get("image_url"),
+            "external_url": metadata.get("external_url"),
+            "collection_address": metadata.get("collection_address"),
+            "token_standard": metadata.get("token_standard"),
+            "is_mutable": metadata.get("is_mutable"),
+            "is_burnt": metadata.get("is_burnt")
+        }
+    
+    async def get_or_create_tokens(self, token_mints: List[str]) -> Dict[str, Token]:
+        """
+        Get many tokens from the database, creating the missing ones together.
+        
+        Tokens not in the token cache are loaded with one query; metadata for
+        the rest is fetched with batched getAsset calls and inserted with one
+        upsert.
+        
+        Args:
+            token_mints: Token mint addresses
+            
+        Returns:
+            Dict mapping each mint to its Token; empty if the database fails
+        """
+        tokens: Dict[str, Token] = {}
+        uncached = []
+        for token_mint in dict.fromkeys(token_mints):
+            token = _token_cache.get(token_mint)
+            if token is not None:
+                tokens[token_mint] = token
+            else:
+                uncached.append(token_mint)
+        if not uncached:
+            return tokens
+        
+        try:
+            async for db_session in get_async_db():
+                try:
+                    stmt = select(Token).where(Token.address.in_(uncached))
+                    result = await db_session.execute(stmt)
+                    stored = {token.address: token for token in result.scalars()}
+                    
+                    missing = [token_mint for token_mint in uncached if token_mint not in stored]
+                    if missing:
+                        logger.info("Tokens not found in database, fetching metadata", extra={
+                            "token_count": len(missing)
+                        })
+                        
+                        async with helius_session_scope() as client:
+                            metadata_by_mint = await client.get_comprehensive_token_metadata_batch(missing)
+                        
+                        rows = [
+                            # Create with minimal info when no metadata is available
+                            self._token_row(token_mint, metadata_by_mint.get(token_mint) or {"decimals": 9})
+                            for token_mint in missing
+                        ]
+                        result = await db_session.execute(
+                            _token_upsert(),
+                            rows,
+                            execution_options={"populate_existing": True}
+                        )
+                        stored.update((token.address, token) for token in result.scalars())
+                        await db_session.commit()
+                        
+                        logger.info("Created tokens in database", extra={
+                            "token_count": len(missing)
+                        })
+                    
+                    for token_mint, token in stored.items():
+                        _token_cache.set(token_mint, token)
+                    tokens.update(stored)
+                    
+                    return tokens
+                    
+                except Exception as e:
+                    await db_session.rollback()
+                    logger.error("Database error in get_or_create_tokens", extra={
+                        "token_count": len(token_mints),
+                        "error": str(e)
+                    })
+                    raise
+                
+                break  # Exit the async generator loop
+                
+        except Exception as e:
+            logger.error("Error in get_or_create_tokens", extra={
+                "token_count": len(token_mints),
+                "error": str(e)
+            })
+            return {}
+    
     async def update_token_metadata(self, token_mint: str, force_refresh: bool = False) -> Optional[Token]:
         """
         Update token metadata from external sources.
@@ -1017,7 +1418,7 @@ class TokenAnalyticsService:
                                 raw_supply = metadata["supply"]
                                 decimals = metadata.get("decimals", token.decimals)
                                 if raw_supply > 0:
-                                    ui_supply = float(raw_supply) / (10 ** decimals)
+                                    ui_supply = _to_ui_amount(raw_supply, decimals)
                                     token.total_supply = ui_supply
                                 else:
                                     token.total_supply = 0
@@ -1042,6 +1443,7 @@ class TokenAnalyticsService:
                             
                             await db_session.commit()
                             await db_session.refresh(token)
+                            _token_cache.set(token_mint, token)
                             
                             logger.info("Updated token metadata", extra={
                                 "token_mint": token_mint,
@@ -1070,89 +1472,142 @@ class TokenAnalyticsService:
     
     async def store_token_metrics(self, token_id: str, metrics_data: Dict[str, Any]) -> bool:
         """
-        Store calculated metrics in the database.
+        Queue calculated metrics for the next bulk insert into the database.
+        
+        Rows are written together every _METRIC_WRITE_INTERVAL seconds, or as
+        soon as _METRIC_WRITE_BATCH rows are waiting; flush_metric_writes()
+        writes whatever is pending and waits for writes already under way.
         
         Args:
             token_id: Token UUID
             metrics_data: Calculated metrics data
             
         Returns:
-            True if stored successfully
+            True if the metrics were queued
+        """
+        try:
+            # Extract metrics from the comprehensive data
+            market_cap = metrics_data.get("market_cap", {})
+            velocity = metrics_data.get("velocity", {})
+            concentration = metrics_data.get("concentration", {})
+            paperhand = metrics_data.get("paperhand", {})
+            concentration_ratios = concentration.get("concentration_ratios", {})
+            
+            # Calculate turnover rate safely
+            volume_24h = velocity.get("volume_24h_usd", 0) or 0
+            market_cap_value = market_cap.get("market_cap_usd", 0) or 0
+            turnover_rate = (volume_24h / market_cap_value) if market_cap_value > 0 else None
+            
+            # Column values for a TokenMetrics row; zero counts are stored as NULL
+            row = {
+                "token_id": token_id,
+                "price_usd": market_cap.get("current_price_usd"),
+                "market_cap": market_cap.get("market_cap_usd"),
+                "volume_24h": volume_24h if volume_24h > 0 else None,
+                "price_change_24h": market_cap.get("price_change_24h_percent"),
+                "token_velocity": velocity.get("velocity_ratio"),
+                "turnover_rate": turnover_rate,
+                "concentration_top_1": concentration_ratios.get("top_1"),
+                "concentration_top_5": concentration_ratios.get("top_5"),
+                "concentration_top_15": concentration_ratios.get("top_15"),
+                "holder_count": concentration.get("total_holders"),
+                "paperhand_ratio": paperhand.get("paperhand_ratio_percent") if paperhand.get("paperhand_ratio_percent", 0) > 0 else None,
+                "diamond_hand_ratio": paperhand.get("diamond_hand_ratio_percent") if paperhand.get("diamond_hand_ratio_percent", 0) > 0 else None,
+                "avg_holding_time": None,  # Would need historical data
+                "transaction_count_24h": velocity.get("transaction_count_24h") if velocity.get("transaction_count_24h", 0) > 0 else None,
+                "unique_traders_24h": velocity.get("unique_traders_24h") if velocity.get("unique_traders_24h", 0) > 0 else None,
+                "avg_transaction_size": velocity.get("avg_transaction_size_usd") if velocity.get("avg_transaction_size_usd", 0) > 0 else None,
+                "timestamp": datetime.now(timezone.utc)
+            }
+            
+        except Exception as e:
+            logger.error("Error preparing token metrics for storage", extra={
+                "token_id": token_id,
+                "error": str(e)
+            })
+            return False
+        
+        loop = asyncio.get_running_loop()
+        if self._metric_flush_loop is not loop:
+            # A timer from a finished event loop (Celery job) will never fire
+            self._metric_flush = None
+            self._metric_flush_loop = loop
+        
+        self._metric_write_buffer.append(row)
+        if len(self._metric_write_buffer) >= _METRIC_WRITE_BATCH:
+            self._schedule_metric_flush()
+        elif self._metric_flush is None:
+            self._metric_flush = loop.call_later(_METRIC_WRITE_INTERVAL, self._schedule_metric_flush)
+        return True
+    
+    def _schedule_metric_flush(self):
+        """Start writing the buffered metric rows in the background."""
+        if self._metric_flush is not None:
+            self._metric_flush.cancel()
+            self._metric_flush = None
+        
+        task = asyncio.get_running_loop().create_task(self._write_buffered_metrics())
+        self._metric_flush_tasks.add(task)
+        task.add_done_callback(self._metric_flush_tasks.discard)
+    
+    async def flush_metric_writes(self) -> int:
+        """
+        Write all buffered metric rows and wait for background writes in progress.
+        
+        Await this before the event loop ends (job end, shutdown): background
+        writes have already taken their rows out of the buffer, so they would
+        be lost if the loop cancelled them.
+        
+        Returns:
+            Number of rows written
+        """
+        written = await self._write_buffered_metrics()
+        
+        loop = asyncio.get_running_loop()
+        in_flight = [task for task in self._metric_flush_tasks if task.get_loop() is loop]
+        if in_flight:
+            results = await asyncio.gather(*in_flight, return_exceptions=True)
+            written += sum(result for result in results if isinstance(result, int))
+        return written
+    
+    async def _write_buffered_metrics(self) -> int:
+        """
+        Write the buffered metric rows with a single bulk insert.
+        
+        Returns:
+            Number of rows written
         """
+        if self._metric_flush is not None:
+            self._metric_flush.cancel()
+            self._metric_flush = None
+        
+        rows, self._metric_write_buffer = self._metric_write_buffer, []
+        if not rows:
+            return 0
+        
         try:
             async for db_session in get_async_db():
                 try:
-                    # Extract metrics from the comprehensive data
-                    market_cap = metrics_data.get("market_cap", {})
-                    velocity = metrics_data.get("velocity", {})
-                    concentration = metrics_data.get("concentration", {})
-                    paperhand = metrics_data.get("paperhand", {})
-                    concentration_ratios = concentration.get("concentration_ratios", {})
-                    
-                    # Handle concentration ratios properly - use available data or NULL
-                    top_1_concentration = concentration_ratios.get("top_1")
-                    top_5_concentration = concentration_ratios.get("top_5") 
-                    top_15_concentration = concentration_ratios.get("top_15")
-                    
-                    # For database storage, map our new metrics to the old column names for compatibility
-                    # This allows us to store the new metrics in the existing database structure
-                    
-                    # Calculate turnover rate safely
-                    volume_24h = velocity.get("volume_24h_usd", 0) or 0
-                    market_cap_value = market_cap.get("market_cap_usd", 0) or 0
-                    turnover_rate = (volume_24h / market_cap_value) if market_cap_value > 0 else None
-                    
-                    # Create new metrics record
-                    token_metrics = TokenMetrics(
-                        token_id=token_id,
-                        price_usd=market_cap.get("current_price_usd"),
-                        market_cap=market_cap.get("market_cap_usd"),
-                        volume_24h=volume_24h if volume_24h > 0 else None,
-                        price_change_24h=market_cap.get("price_change_24h_percent"),
-                        token_velocity=velocity.get("velocity_ratio"),
-                        turnover_rate=turnover_rate,
-                        concentration_top_1=top_1_concentration,
-                        concentration_top_5=top_5_concentration,
-                        concentration_top_15=top_15_concentration,  
-                        holder_count=concentration.get("total_holders"),
-                        paperhand_ratio=paperhand.get("paperhand_ratio_percent") if paperhand.get("paperhand_ratio_percent", 0) > 0 else None,
-                        diamond_hand_ratio=paperhand.get("diamond_hand_ratio_percent") if paperhand.get("diamond_hand_ratio_percent", 0) > 0 else None,
-                        avg_holding_time=None,  # Would need historical data
-                        transaction_count_24h=velocity.get("transaction_count_24h") if velocity.get("transaction_count_24h", 0) > 0 else None,
-                        unique_traders_24h=velocity.get("unique_traders_24h") if velocity.get("unique_traders_24h", 0) > 0 else None,
-                        avg_transaction_size=velocity.get("avg_transaction_size_usd") if velocity.get("avg_transaction_size_usd", 0) > 0 else None,
-                        timestamp=datetime.now(timezone.utc)
-                    )
-                    
-                    db_session.add(token_metrics)
+                    await db_session.execute(insert(TokenMetrics), rows)
                     await db_session.commit()
                     
-                    logger.info("Stored token metrics in database", extra={
-                        "token_id": token_id,
-                        "market_cap": market_cap.get("market_cap_usd"),
-                        "velocity": velocity.get("velocity_ratio"),
-                        "top_1_concentration": top_1_concentration,
-                        "data_quality": concentration.get("data_quality", "unknown")
-                    })
-                    
-                    return True
+                    logger.info("Stored token metrics in database", extra={"rows": len(rows)})
+                    return len(rows)
                     
                 except Exception as e:
                     await db_session.rollback()
                     logger.error("Database error storing token metrics", extra={
-                        "token_id": token_id,
+                        "rows": len(rows),
                         "error": str(e)
                     })
-                    return False
-                
-                break  # Exit the async generator loop
+                    return 0
                 
         except Exception as e:
             logger.error("Error storing token metrics", extra={
-                "token_id": token_id,
+                "rows": len(rows),
                 "error": str(e)
             })
-            return False
+        return 0
 
 
 # Global analytics service instance
@@ -6,6 +6,7 @@ Implements Solana RPC WebSocket subscriptions for live blockchain data.
 import json
 import asyncio
 import websockets
+import orjson
 from typing import Dict, List, Set, Any, Optional, Callable
 from datetime import datetime, timezone
 from uuid import uuid4
@@ -162,7 +163,7 @@ class SolanaWebSocketManager:
                     self.solana_websocket.recv(), 
                     timeout=25.0  # Slightly less than ping interval
                 )
-                data = json.loads(message)
+                data = orjson.loads(message)
                 
                 # Handle different message types
                 if "method" in data:
@@ -290,7 +291,7 @@ class SolanaWebSocketManager:
                     self.subscription_callbacks.pop(request_id, None)
                     raise
             
-            await self.solana_websocket.send(json.dumps(request))
+            await self.solana_websocket.send(orjson.dumps(request).decode())
             logger.debug("Sent subscription request", extra={
                 "method": method,
                 "request_id": request_id,
@@ -308,7 +309,7 @@ class SolanaWebSocketManager:
             # Try to reconnect and retry once
             try:
                 await self._connect_to_solana()
-                await self.solana_websocket.send(json.dumps(request))
+                await self.solana_websocket.send(orjson.dumps(request).decode())
                 logger.info("Successfully retried subscription after reconnection", extra={
                     "method": method,
                     "request_id": request_id
@@ -359,7 +360,7 @@ class SolanaWebSocketManager:
             
             try:
                 if self.solana_websocket and not self.solana_websocket.closed:
-                    await self.solana_websocket.send(json.dumps(request))
+                    await self.solana_websocket.send(orjson.dumps(request).decode())
                     logger.debug("Sent unsubscribe request", extra={
                         "method": unsubscribe_method,
                         "subscription_id": actual_subscription_id
@@ -448,6 +449,28 @@ class SolanaWebSocketManager:
     
     # Token-specific subscription methods
     
+    async def subscribe_account(self, address: str, callback: Callable, commitment: str = "confirmed") -> int:
+        """
+        Subscribe to changes of a single account on the shared Solana WebSocket.
+        
+        Args:
+            address: Account address to monitor
+            callback: Coroutine called with (subscription_id, result) on each update
+            commitment: Commitment level for notifications
+            
+        Returns:
+            Request ID to pass to unsubscribe()
+        """
+        return await self._create_subscription(
+            "accountSubscribe",
+            [address, {"encoding": "jsonParsed", "commitment": commitment}],
+            callback
+        )
+    
+    async def unsubscribe(self, request_id: int):
+        """Cancel a subscription created with subscribe_account()."""
+        await self._unsubscribe(request_id)
+    
     async def subscribe_to_token_accounts(self, token_mint: str, max_accounts_to_monitor: int = 10) -> List[int]:
         """
         Subscribe to token account changes for holder analysis.
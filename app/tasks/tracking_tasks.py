@@ -3,7 +3,7 @@ Tracking tasks for fetching token analytics at scheduled intervals.
 """
 
 from datetime import datetime, timezone, timedelta
-from typing import List, Dict, Any, Optional
+from typing import Any, Awaitable, Dict, List, Optional, TypeVar
 
 from sqlalchemy import select, update
 from sqlalchemy.ext.asyncio import AsyncSession
@@ -12,10 +12,35 @@ from app.core.celery import celery_app
 from app.core.database import get_async_db
 from app.core.logging import get_logger
 from app.models.market_data import TrackingJob
+from app.services.cache import cache
+from app.services.solana.helius_client import HeliusRPCClient
 from app.services.token_analytics_service import token_analytics_service
 
 logger = get_logger(__name__)
 
+T = TypeVar("T")
+
+
+async def _with_task_resources(coro: Awaitable[T]) -> T:
+    """
+    Run a task coroutine with loop-bound clients opened and closed around it.
+    
+    Each Celery task runs in its own asyncio.run() loop, and both the Redis
+    pool and the Helius HTTP client are bound to the loop that opened them,
+    so they live as long as the task. Without Redis the task still runs,
+    uncached.
+    """
+    try:
+        await cache.connect()
+    except Exception:
+        logger.warning("Running task without Redis cache")
+    try:
+        return await coro
+    finally:
+        # Close the HTTP pool here; the next task's loop could not close it
+        await HeliusRPCClient.close_session()
+        await cache.disconnect()
+
 
 @celery_app.task(name="app.tasks.tracking_tasks.check_and_execute_tracking_jobs")
 def check_and_execute_tracking_jobs() -> Dict[str, Any]:
@@ -28,7 +53,7 @@ def check_and_execute_tracking_jobs() -> Dict[str, Any]:
     logger.info("Checking for tracking jobs to execute")
     
     # Run the async function in the synchronous Celery task
-    return asyncio.run(_check_and_execute_tracking_jobs_async())
+    return asyncio.run(_with_task_resources(_check_and_execute_tracking_jobs_async()))
 
 
 @celery_app.task(name="app.tasks.tracking_tasks.execute_tracking_job")
@@ -41,7 +66,7 @@ def execute_tracking_job(job_id: str) -> Dict[str, Any]:
     logger.info(f"Executing tracking job {job_id}")
     
     # Run the async function in the synchronous Celery task
-    return asyncio.run(_execute_tracking_job_async(job_id))
+    return asyncio.run(_with_task_resources(_execute_tracking_job_async(job_id)))
 
 
 @celery_app.task(name="app.tasks.tracking_tasks.cleanup_expired_cache")
@@ -53,7 +78,7 @@ def cleanup_expired_cache() -> Dict[str, Any]:
     
     logger.info("Starting cache cleanup task")
     
-    return asyncio.run(_cleanup_expired_cache_async())
+    return asyncio.run(_with_task_resources(_cleanup_expired_cache_async()))
 
 
 async def _check_and_execute_tracking_jobs_async() -> Dict[str, Any]:
@@ -230,6 +255,10 @@ async def _execute_job(db_session: AsyncSession, job: TrackingJob) -> None:
             "token_count": len(job.token_addresses)
         })
         
+        # Create any untracked tokens together, with batched metadata lookups,
+        # so the per-token calculations below find them already stored
+        await token_analytics_service.get_or_create_tokens(job.token_addresses)
+        
         # Process each token in the job
         for token_address in job.token_addresses:
             try:
@@ -251,6 +280,9 @@ async def _execute_job(db_session: AsyncSession, job: TrackingJob) -> None:
                 # Continue processing other tokens
                 continue
         
+        # The job's event loop ends with the task, so write buffered metrics now
+        await token_analytics_service.flush_metric_writes()
+        
         logger.info("Job execution completed", extra={"job_id": job.job_id})
         
     except Exception as e:
@@ -264,11 +296,6 @@ async def _execute_job(db_session: AsyncSession, job: TrackingJob) -> None:
 async def _cleanup_expired_cache_async() -> Dict[str, Any]:
     """Clean up expired cache entries."""
     try:
-        from app.services.cache import cache
-        
-        # Ensure cache connection
-        await cache._ensure_connection()
-        
         # Get cache statistics before cleanup
         stats_before = await cache.get_cache_stats()
         